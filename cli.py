@@ -26,7 +26,7 @@ def main(argv: List[str] = None) -> int:
     )
     parser.add_argument("--json", action="store_true", help="Output JSON instead of a table")
     parser.add_argument("--limit", type=int, default=1000, help="Page size when listing projects")
-    parser.add_argument("--max-workers", type=int, default=12, help="Concurrency for details fetch")
+    parser.add_argument("--max-workers", type=int, default=None, help="Concurrency for details fetch (default: connection pool size)")
     parser.add_argument("--debug", action="store_true", help="Print debug info to stderr")
     args = parser.parse_args(argv)
 
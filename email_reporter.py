@@ -9,9 +9,18 @@ Sends daily reports with account status, project configurations, and any changes
 import os
 import io
 import csv
+import codecs
 import smtplib
+import logging
+import tempfile
+import time
+from html import escape
+from string import Template
+from functools import lru_cache
+from types import MappingProxyType
+from collections import namedtuple
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import IO, List, Dict, Any, Mapping, Optional, Tuple
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
@@ -20,6 +29,91 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Inline styles shared by the APcampaign/APNews table templates
+_TR_ROW = "border-bottom: 1px solid #ddd;"
+_TD_MONO = "padding: 8px; font-size: 11px; font-family: monospace;"
+_TD_SMALL = "padding: 8px; font-size: 11px;"
+_TD_CENTER = "padding: 8px; text-align: center;"
+_TH_LEFT = "padding: 10px 8px; text-align: left; font-size: 12px; font-weight: 600; color: #495057; border-bottom: 2px solid #dee2e6;"
+_TH_CENTER = "padding: 10px 8px; text-align: center; font-size: 12px; font-weight: 600; color: #495057; border-bottom: 2px solid #dee2e6;"
+_TABLE_WRAPPER_OPEN = """
+        <div style="margin: 20px 0;">
+            <h4 style="margin: 0 0 15px 0; color: #1976d2; font-size: 16px;">$title</h4>
+            <table style="width: 100%; border-collapse: collapse; border: 1px solid #ddd; background-color: white;">
+                <thead>
+                    <tr style="background-color: #f8f9fa;">"""
+_TABLE_WRAPPER_CLOSE = """
+                    </tr>
+                </thead>
+                <tbody>
+                    $rows
+                </tbody>
+            </table>
+        </div>
+        """
+
+# Column order of the daily reset report CSV attachment
+_REPORT_CSV_FIELDS = [
+    "Monitoring Type", "Account ID", "Account Name", "Account Status", "Total Projects",
+    "Auto Scan Setting", "Scans Per Day", "Configuration", "Projects Reset", "Last Updated", "Scan Status",
+]
+
+# Spill the CSV attachment to disk once it grows past this many bytes
+_CSV_SPOOL_MAX_SIZE = 1 << 20
+
+# Window for "recent" account changes in the daily report
+_RECENT_CHANGE_WINDOW_SECONDS = 24 * 60 * 60
+
+# Status icon and colour for an APcampaign reset, keyed on reset success
+_RESET_STATUS = {True: ("✅", "#28a745"), False: ("❌", "#dc3545")}
+
+# Pre-truncated, HTML-escaped per-row fields for the APcampaign table; tuples of these key the render cache
+_APCampaignRowView = namedtuple(
+    "_APCampaignRowView", "project_id campaign_id locations old_config new_config status_icon status_color"
+)
+
+# HTML templates for the APcampaign/APNews tables and error block, parsed once at import
+_APCAMPAIGN_ROW = Template(f"""
+            <tr style="{_TR_ROW}">
+                <td style="{_TD_MONO}">$project_id...</td>
+                <td style="{_TD_CENTER}">$campaign_id</td>
+                <td style="{_TD_SMALL}">$locations...</td>
+                <td style="{_TD_CENTER}">$old_config</td>
+                <td style="{_TD_CENTER} color: $status_color; font-weight: bold;">$status_icon $new_config</td>
+            </tr>
+            """)
+
+_APNEWS_ROW = Template(f"""
+            <tr style="{_TR_ROW}">
+                <td style="{_TD_MONO}">$account_id</td>
+                <td style="{_TD_SMALL}">$account_name</td>
+                <td style="{_TD_CENTER}">$status</td>
+            </tr>
+            """)
+
+_APCAMPAIGN_TABLE = Template(_TABLE_WRAPPER_OPEN + f"""
+                        <th style="{_TH_LEFT}">Project ID</th>
+                        <th style="{_TH_CENTER}">Campaign</th>
+                        <th style="{_TH_LEFT}">Locations</th>
+                        <th style="{_TH_CENTER}">Old Config</th>
+                        <th style="{_TH_CENTER}">New Config</th>""" + _TABLE_WRAPPER_CLOSE)
+
+_APNEWS_TABLE = Template(_TABLE_WRAPPER_OPEN + f"""
+                        <th style="{_TH_LEFT}">Account ID</th>
+                        <th style="{_TH_LEFT}">Account Name</th>
+                        <th style="{_TH_CENTER}">Status</th>""" + _TABLE_WRAPPER_CLOSE)
+
+_ERROR_MESSAGE = Template("""
+        <div style="background-color: #ffebee; border-left: 4px solid #f44336; padding: 15px; margin: 20px 0; border-radius: 4px;">
+            <p style="margin: 0; font-size: 15px; color: #d32f2f; font-weight: bold;">
+                ❌ ${message}
+            </p>
+            ${details_html}
+        </div>
+        """)
+
 
 class EmailSender:
     """Email sender class for sending HTML emails with CSV attachments."""
@@ -55,8 +149,13 @@ class EmailSender:
                    recipients: Optional[List[str]] = None,
                    cc_recipients: Optional[List[str]] = None,
                    csv_data: Optional[List[Dict[str, Any]]] = None,
-                   csv_filename: Optional[str] = None) -> bool:
-        """Send an HTML email with optional CSV attachment."""
+                   csv_filename: Optional[str] = None,
+                   csv_stream: Optional[IO[bytes]] = None) -> bool:
+        """Send an HTML email with optional CSV attachment.
+
+        The attachment comes either from ``csv_data`` rows or from ``csv_stream``,
+        a binary file object positioned at the start of already-encoded CSV.
+        """
         
         try:
             # Get recipients from environment if not provided
@@ -83,9 +182,12 @@ class EmailSender:
             msg.attach(html_part)
             
             # Attach CSV if data provided
-            if csv_data and csv_filename:
-                csv_content = self._generate_csv_content(csv_data)
-                csv_part = MIMEApplication(csv_content.encode("utf-8"), _subtype="csv")
+            if csv_filename and (csv_stream is not None or csv_data):
+                if csv_stream is not None:
+                    csv_bytes = csv_stream.read()
+                else:
+                    csv_bytes = self._generate_csv_content(csv_data).encode("utf-8")
+                csv_part = MIMEApplication(csv_bytes, _subtype="csv")
                 csv_part.add_header("Content-Disposition", "attachment", filename=csv_filename)
                 msg.attach(csv_part)
             
@@ -188,14 +290,15 @@ class HTMLEmailBuilder:
     @staticmethod
     def build_summary_stats(stats: Dict[str, Any]) -> str:
         """Build a summary statistics box"""
-        stats_html = ""
+        stat_parts = []
         for key, value in stats.items():
-            stats_html += f"""
+            stat_parts.append(f"""
             <div style="display: inline-block; background: #f8f9fa; padding: 10px 15px; margin: 5px; border-radius: 6px; border-left: 3px solid #1a73e8;">
                 <div style="font-size: 11px; color: #666; text-transform: uppercase;">{key}</div>
                 <div style="font-size: 18px; font-weight: bold; color: #333;">{value}</div>
             </div>
-            """
+            """)
+        stats_html = "".join(stat_parts)
         
         return f"""
         <div style="background-color: #ffffff; border: 1px solid #e0e0e0; padding: 20px; margin: 20px 0; border-radius: 8px;">
@@ -226,7 +329,7 @@ class HTMLEmailBuilder:
         <th style="padding: 12px; border: 1px solid #ddd; background-color: #1a73e8; color: white; font-size: 13px;">Projects Reset</th>
         """
         
-        rows = ""
+        row_parts = []
         for account in accounts:
             # Handle different status types with appropriate colors
             status = account.get("status", "UNKNOWN")
@@ -260,7 +363,7 @@ class HTMLEmailBuilder:
                 config_color = "#2196f3"  # Blue for other
                 config_icon = "ℹ️"
             
-            rows += f"""
+            row_parts.append(f"""
             <tr style="background-color: {row_bg};">
                 <td style="padding: 10px; border: 1px solid #ddd; font-family: monospace;">{account.get('account_id', 'N/A')}</td>
                 <td style="padding: 10px; border: 1px solid #ddd; font-size: 12px;">{account_name}</td>
@@ -279,7 +382,8 @@ class HTMLEmailBuilder:
                 </td>
                 <td style="padding: 8px; border: 1px solid #ddd; font-size: 13px; text-align: center; font-weight: bold;">{account.get('projects_reset', account.get('total_projects', 0))}</td>
             </tr>
-            """
+            """)
+        rows = "".join(row_parts)
         
         return f"""
         <div style="margin: 20px 0;">
@@ -308,7 +412,7 @@ class GeoEdgeEmailReporter:
         self.sender = EmailSender()
         self.builder = HTMLEmailBuilder()
     
-    def send_daily_reset_report(self, report_data: Dict[str, Any]) -> bool:
+    def send_daily_reset_report(self, report_data: Mapping[str, Any]) -> bool:
         """
         Send comprehensive daily reset report email for both Auto Mode (1,72) and APcampaign (1,12) monitoring.
         
@@ -320,6 +424,10 @@ class GeoEdgeEmailReporter:
         """
         
         try:
+            # Single timestamp for subject, CSV rows and filename so they stay consistent
+            now_utc = datetime.now(timezone.utc)
+            last_updated = now_utc.strftime("%Y-%m-%d %H:%M:%S UTC")
+            
             # Extract both monitoring results
             status = report_data.get("status", "success")
             
@@ -437,8 +545,6 @@ class GeoEdgeEmailReporter:
             """)
             
             # Process Auto Mode account changes
-            recent_auto_accounts = self._filter_recent_changes(accounts_reset)
-            
             if recent_auto_accounts:
                 priority_accounts = [acc for acc in recent_auto_accounts if "PRIORITY" in acc.get("status", "")]
                 inactive_accounts = [acc for acc in recent_auto_accounts if acc.get("auto_scan", 0) == 0 and "PRIORITY" not in acc.get("status", "")]
@@ -485,7 +591,7 @@ class GeoEdgeEmailReporter:
                 """.format(auto_mode_accounts_monitored, apcampaign_projects_monitored, apnews_accounts_monitored, apnews_newly_inactive_count, apnews_unknown_count)
                 ]
             
-            # Build final email
+            # Build final email; empty sections (e.g. tables with no rows) join as nothing
             main_content = "".join(content_parts)
             
             html_content = self.builder.build_geoedge_email(
@@ -494,12 +600,16 @@ class GeoEdgeEmailReporter:
                 main_content=main_content
             )
             
-            # Prepare CSV data for attachment (include both types of changes)
-            csv_data = []
+            # Write CSV rows for the attachment (include both types of changes) into a
+            # spooled buffer rather than collecting them in a list first
+            csv_stream = tempfile.SpooledTemporaryFile(max_size=_CSV_SPOOL_MAX_SIZE)
+            writer = csv.DictWriter(codecs.getwriter("utf-8")(csv_stream), fieldnames=_REPORT_CSV_FIELDS)
+            writer.writeheader()
+            csv_row_count = len(recent_auto_accounts) + len(apcampaign_accounts_reset) + len(apnews_newly_inactive_accounts)
             
             # Add Auto Mode account data
             for account in recent_auto_accounts:
-                csv_data.append({
+                writer.writerow({
                     "Monitoring Type": "Auto Mode (1,72)",
                     "Account ID": account.get("account_id"),
                     "Account Name": account.get("account_name", "N/A"),
@@ -509,13 +619,13 @@ class GeoEdgeEmailReporter:
                     "Scans Per Day": account.get("scans_per_day", 0),
                     "Configuration": f"({account.get('auto_scan', 0)},{account.get('scans_per_day', 0)})",
                     "Projects Reset": account.get("projects_reset", 0),
-                    "Last Updated": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
+                    "Last Updated": last_updated,
                     "Scan Status": "Disabled" if (account.get('auto_scan', 0) == 0) else "Enabled"
                 })
             
             # Add APcampaign account data  
             for account in apcampaign_accounts_reset:
-                csv_data.append({
+                writer.writerow({
                     "Monitoring Type": "APcampaign (1,12)",
                     "Account ID": f"Campaign {account.get('campaign_id', 'N/A')}",
                     "Account Name": "N/A",
@@ -525,13 +635,13 @@ class GeoEdgeEmailReporter:
                     "Scans Per Day": 0,  # Now reset to 0
                     "Configuration": account.get('new_config', '0,0'),
                     "Projects Reset": 1 if account.get('reset_success') else 0,
-                    "Last Updated": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
+                    "Last Updated": last_updated,
                     "Scan Status": "Disabled" if account.get('reset_success') else "Failed"
                 })
 
             # Add APNews inactive account data
             for account in apnews_newly_inactive_accounts:
-                csv_data.append({
+                writer.writerow({
                     "Monitoring Type": "APNews Accounts",
                     "Account ID": account.get("account_id"),
                     "Account Name": account.get("account_name", "N/A"),
@@ -541,12 +651,12 @@ class GeoEdgeEmailReporter:
                     "Scans Per Day": "N/A",
                     "Configuration": "N/A",
                     "Projects Reset": 0,
-                    "Last Updated": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
+                    "Last Updated": last_updated,
                     "Scan Status": "N/A"
                 })
             
             # Send email
-            date_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+            date_str = now_utc.strftime("%Y-%m-%d")
             
             # Adjust subject line based on results
             if total_all_projects_reset == 0:
@@ -567,158 +677,130 @@ class GeoEdgeEmailReporter:
             else:
                 subject = f"❌ GeoEdge Comprehensive Monitor - System Error Detected ({date_str})"
             
-            csv_filename = f"geoedge_comprehensive_report_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M')}.csv"
+            csv_filename = f"geoedge_comprehensive_report_{now_utc.strftime('%Y%m%d_%H%M')}.csv"
             
-            return self.sender.send_email(
-                subject=subject,
-                html_content=html_content,
-                csv_data=csv_data if csv_data else None,
-                csv_filename=csv_filename if csv_data else None
-            )
+            csv_stream.seek(0)
             
-        except Exception as e:
-            print(f"❌ Failed to send reset report email: {str(e)}")
+            with csv_stream:
+                return self.sender.send_email(
+                    subject=subject,
+                    html_content=html_content,
+                    csv_filename=csv_filename if csv_row_count else None,
+                    csv_stream=csv_stream if csv_row_count else None
+                )
+            
+        except Exception:
+            logger.exception("❌ Failed to send reset report email")
             return False
     
     def _build_apcampaign_table(self, apcampaign_accounts: List[Dict], success_count: int, failure_count: int) -> str:
         """Build HTML table for APcampaign account changes"""
+        if not apcampaign_accounts:
+            return ""
+        rows_key = tuple(
+            _APCampaignRowView(
+                escape(str(account.get('project_id') or 'N/A')[:20]),
+                escape(str(account.get('campaign_id', 'N/A'))),
+                escape(str(account.get('locations') or 'N/A')[:15]),
+                escape(str(account.get('old_config', 'N/A'))),
+                escape(str(account.get('new_config', 'N/A'))),
+                *_RESET_STATUS[bool(account.get('reset_success'))],
+            )
+            for account in apcampaign_accounts
+        )
+        return self._render_apcampaign_table(rows_key, success_count, failure_count)
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _render_apcampaign_table(rows_key: Tuple[_APCampaignRowView, ...], success_count: int, failure_count: int) -> str:
+        """Render APcampaign table HTML, cached on row content so resends skip formatting"""
         
-        title = f"🔧 APcampaign Changes (1,12 → 0,0) - {len(apcampaign_accounts)} Projects ({success_count} Success, {failure_count} Failed)"
+        title = f"🔧 APcampaign Changes (1,12 → 0,0) - {len(rows_key)} Projects ({success_count} Success, {failure_count} Failed)"
         
         # Build table rows
-        rows = ""
-        for account in apcampaign_accounts:
-            status_icon = "✅" if account.get('reset_success') else "❌"
-            status_color = "#28a745" if account.get('reset_success') else "#dc3545"
-            
-            rows += f"""
-            <tr style="border-bottom: 1px solid #ddd;">
-                <td style="padding: 8px; font-size: 11px; font-family: monospace;">{account.get('project_id', 'N/A')[:20]}...</td>
-                <td style="padding: 8px; text-align: center;">{account.get('campaign_id', 'N/A')}</td>
-                <td style="padding: 8px; font-size: 11px;">{account.get('locations', 'N/A')[:15]}...</td>
-                <td style="padding: 8px; text-align: center;">{account.get('old_config', 'N/A')}</td>
-                <td style="padding: 8px; text-align: center; color: {status_color}; font-weight: bold;">{status_icon} {account.get('new_config', 'N/A')}</td>
-            </tr>
-            """
+        parts = []
+        for row in rows_key:
+            parts.append(_APCAMPAIGN_ROW.substitute(row._asdict()))
+        rows = "".join(parts)
         
-        return f"""
-        <div style="margin: 20px 0;">
-            <h4 style="margin: 0 0 15px 0; color: #1976d2; font-size: 16px;">{title}</h4>
-            <table style="width: 100%; border-collapse: collapse; border: 1px solid #ddd; background-color: white;">
-                <thead>
-                    <tr style="background-color: #f8f9fa;">
-                        <th style="padding: 10px 8px; text-align: left; font-size: 12px; font-weight: 600; color: #495057; border-bottom: 2px solid #dee2e6;">Project ID</th>
-                        <th style="padding: 10px 8px; text-align: center; font-size: 12px; font-weight: 600; color: #495057; border-bottom: 2px solid #dee2e6;">Campaign</th>
-                        <th style="padding: 10px 8px; text-align: left; font-size: 12px; font-weight: 600; color: #495057; border-bottom: 2px solid #dee2e6;">Locations</th>
-                        <th style="padding: 10px 8px; text-align: center; font-size: 12px; font-weight: 600; color: #495057; border-bottom: 2px solid #dee2e6;">Old Config</th>
-                        <th style="padding: 10px 8px; text-align: center; font-size: 12px; font-weight: 600; color: #495057; border-bottom: 2px solid #dee2e6;">New Config</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {rows}
-                </tbody>
-            </table>
-        </div>
-        """
+        return _APCAMPAIGN_TABLE.substitute(title=title, rows=rows)
     def _build_apnews_table(self, apnews_accounts: List[Dict], total_monitored: int, unknown_count: int) -> str:
         """Build HTML table for APNews inactive accounts"""
+        if not apnews_accounts:
+            return ""
+        rows_key = tuple(
+            (escape(str(account.get('account_id', 'N/A'))),
+             escape(str(account.get('account_name', 'N/A'))),
+             escape(str(account.get('status', 'N/A'))))
+            for account in apnews_accounts
+        )
+        return self._render_apnews_table(rows_key, total_monitored, unknown_count)
 
-        title = f"📰 APNews Inactive Accounts (Last 24h) - {len(apnews_accounts)} Inactive (Total: {total_monitored}, Unknown: {unknown_count})"
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _render_apnews_table(rows_key: Tuple[tuple, ...], total_monitored: int, unknown_count: int) -> str:
+        """Render APNews table HTML, cached on row content so resends skip formatting"""
 
-        rows = ""
-        for account in apnews_accounts:
-            rows += f"""
-            <tr style="border-bottom: 1px solid #ddd;">
-                <td style="padding: 8px; font-size: 11px; font-family: monospace;">{account.get('account_id', 'N/A')}</td>
-                <td style="padding: 8px; font-size: 11px;">{account.get('account_name', 'N/A')}</td>
-                <td style="padding: 8px; text-align: center;">{account.get('status', 'N/A')}</td>
-            </tr>
-            """
+        title = f"📰 APNews Inactive Accounts (Last 24h) - {len(rows_key)} Inactive (Total: {total_monitored}, Unknown: {unknown_count})"
 
-        return f"""
-        <div style="margin: 20px 0;">
-            <h4 style="margin: 0 0 15px 0; color: #1976d2; font-size: 16px;">{title}</h4>
-            <table style="width: 100%; border-collapse: collapse; border: 1px solid #ddd; background-color: white;">
-                <thead>
-                    <tr style="background-color: #f8f9fa;">
-                        <th style="padding: 10px 8px; text-align: left; font-size: 12px; font-weight: 600; color: #495057; border-bottom: 2px solid #dee2e6;">Account ID</th>
-                        <th style="padding: 10px 8px; text-align: left; font-size: 12px; font-weight: 600; color: #495057; border-bottom: 2px solid #dee2e6;">Account Name</th>
-                        <th style="padding: 10px 8px; text-align: center; font-size: 12px; font-weight: 600; color: #495057; border-bottom: 2px solid #dee2e6;">Status</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {rows}
-                </tbody>
-            </table>
-        </div>
-        """
+        parts = []
+        for account_id, account_name, status in rows_key:
+            parts.append(_APNEWS_ROW.substitute(
+                account_id=account_id,
+                account_name=account_name,
+                status=status,
+            ))
+        rows = "".join(parts)
+
+        return _APNEWS_TABLE.substitute(title=title, rows=rows)
         
     def _filter_recent_changes(self, accounts_reset: List[Dict]) -> List[Dict]:
         """Filter accounts to only include those with changes in the last 24 hours"""
-        from datetime import datetime, timedelta
-        
-        recent_accounts = []
-        cutoff_time = datetime.now() - timedelta(hours=24)
-        
-        for account in accounts_reset:
-            status = account.get("status", "")
-            
-            # Always include priority newly inactive accounts
-            if "PRIORITY" in status or "NEWLY_INACTIVE" in status:
-                recent_accounts.append(account)
-                continue
-            
-            # Include accounts that had actual resets (projects_reset > 0)
-            projects_reset = account.get("projects_reset", 0)
-            if projects_reset > 0:
-                recent_accounts.append(account)
-                continue
-                
-            # For other accounts, only include if they have recent timestamps
-            # This would need to be implemented based on your specific timestamp fields
-            # For now, exclude accounts that seem to be just status quo
-            if status in ["RESET_TO_MANUAL", "ACTIVE_AUTO_SCAN"]:
-                # Only include if there were actual changes, not just status checks
-                continue
-        
-        return recent_accounts    
+        # Priority/newly inactive accounts are always included, as are accounts that had
+        # actual resets (projects_reset > 0) or carry an updated_at_epoch (int seconds)
+        # inside the window. Status-quo accounts (RESET_TO_MANUAL, ACTIVE_AUTO_SCAN
+        # without resets) fall through and are excluded.
+        cutoff = int(time.time()) - _RECENT_CHANGE_WINDOW_SECONDS
+        return [
+            account for account in accounts_reset
+            if "PRIORITY" in (account.get("status") or "")
+            or "NEWLY_INACTIVE" in (account.get("status") or "")
+            or (account.get("projects_reset") or 0) > 0
+            or (account.get("updated_at_epoch") or 0) >= cutoff
+        ]
+    
     def build_error_message(self, message: str, details: Optional[str] = None) -> str:
         """Build an error message HTML block"""
         details_html = f"<p style=\"margin: 10px 0 0 0; font-size: 13px; color: #d32f2f;\">{details}</p>" if details else ""
         
-        return f"""
-        <div style="background-color: #ffebee; border-left: 4px solid #f44336; padding: 15px; margin: 20px 0; border-radius: 4px;">
-            <p style="margin: 0; font-size: 15px; color: #d32f2f; font-weight: bold;">
-                ❌ {message}
-            </p>
-            {details_html}
-        </div>
-        """
+        return _ERROR_MESSAGE.substitute(message=message, details_html=details_html)
+
+
+# Sample report payload used by send_test_email
+_TEST_DATA: Mapping[str, Any] = MappingProxyType({
+    "total_accounts_checked": 97,
+    "inactive_accounts": 4,
+    "active_accounts": 93,
+    "total_projects_scanned": 1025,
+    "projects_reset": 0,
+    "execution_time": 45.2,
+    "status": "success",
+    "inactive_account_details": (
+        MappingProxyType({"account_id": "1234567", "status": "INACTIVE", "project_count": 150, "changes_made": 0}),
+        MappingProxyType({"account_id": "2345678", "status": "INACTIVE", "project_count": 200, "changes_made": 0}),
+    ),
+    "active_account_details": (
+        MappingProxyType({"account_id": "3456789", "status": "ACTIVE", "project_count": 25, "changes_made": 0}),
+        MappingProxyType({"account_id": "4567890", "status": "ACTIVE", "project_count": 10, "changes_made": 0}),
+    )
+})
 
 
 def send_test_email():
     """Send a test email to verify configuration"""
     reporter = GeoEdgeEmailReporter()
     
-    test_data = {
-        "total_accounts_checked": 97,
-        "inactive_accounts": 4, 
-        "active_accounts": 93,
-        "total_projects_scanned": 1025,
-        "projects_reset": 0,
-        "execution_time": 45.2,
-        "status": "success",
-        "inactive_account_details": [
-            {"account_id": "1234567", "status": "INACTIVE", "project_count": 150, "changes_made": 0},
-            {"account_id": "2345678", "status": "INACTIVE", "project_count": 200, "changes_made": 0},
-        ],
-        "active_account_details": [
-            {"account_id": "3456789", "status": "ACTIVE", "project_count": 25, "changes_made": 0},
-            {"account_id": "4567890", "status": "ACTIVE", "project_count": 10, "changes_made": 0},
-        ]
-    }
-    
-    success = reporter.send_daily_reset_report(test_data)
+    success = reporter.send_daily_reset_report(_TEST_DATA)
     
     if success:
         print("✅ Test email sent successfully!")
@@ -729,5 +811,6 @@ def send_test_email():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     print("GeoEdge Email Reporter - Test Mode")
     send_test_email()
\ No newline at end of file
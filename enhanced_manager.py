@@ -11,20 +11,115 @@ Features:
 """
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
+import numpy as np
 import pymysql
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import io
 import os
+import re
+import logging
 import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+
+# Use orjson for API payloads when it is installed (faster C codec working on bytes)
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    import json
+    json_loads = json.loads
+    def json_dumps(obj):
+        return json.dumps(obj).encode()
 from datetime import datetime, timedelta
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Configuration
 API_KEY = os.getenv("GEOEDGE_API_KEY")
 BASE_URL = "https://api.geoedge.com/rest/analytics/v3"
+API_MAX_WORKERS = 16  # Concurrent GeoEdge API calls when checking project status
+AVAILABLE_LOCATIONS = ['IT', 'FR', 'DE', 'ES']  # Countries selectable in the sidebar
+RESULTS_REPAINT_INTERVAL = 0.25  # Minimum seconds between live results table repaints
+STATUS_SAMPLE_SIZE = 25  # Projects checked before a smart update decides whether checking is worthwhile
+SAMPLE_MISMATCH_RATE = 0.95  # Sampled mismatch rate above which a smart update skips the checks
+
+# Local cache of project API settings, so known-correct projects are not re-checked
+STATUS_CACHE_DB = os.getenv("GEOEDGE_STATUS_CACHE_DB", "geoedge_status_cache.db")
+STATUS_CACHE_TTL = 600  # Seconds a cached API status is trusted
+
+# Shared keep-alive session for GeoEdge API calls (pool sized above API_MAX_WORKERS)
+SESSION = requests.Session()
+SESSION.headers.update({"Authorization": API_KEY})
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "PUT"],
+        raise_on_status=False,
+    ),
+))
+
+class RateLimiter:
+    """Thread-safe token bucket: calls go straight through while under the rate and wait only for the next free slot when over it"""
+    
+    def __init__(self, max_rate, time_period=1.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rate, self._tokens + (now - self._last) * self.max_rate / self.time_period)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens * self.time_period / self.max_rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+class StatusBuffer:
+    """Column-oriented accumulator for per-project status rows, turned into a DataFrame without per-row dicts"""
+    
+    COLUMNS = ('project_id', 'campaign_id', 'locations', 'creation_date', 'status', 'project_name',
+               'current_auto_scan', 'current_times_per_day', 'api_accessible')
+    
+    def __init__(self):
+        self.columns = {name: [] for name in self.COLUMNS}
+    
+    def __len__(self):
+        return len(self.columns['project_id'])
+    
+    def append(self, **row):
+        for name, values in self.columns.items():
+            values.append(row[name])
+    
+    def to_df(self, target_auto_scan, target_times_per_day):
+        """Build the status DataFrame, deriving is_correct/needs_update for all rows in one vectorized pass"""
+        df = pd.DataFrame(self.columns)
+        accessible = df['api_accessible'].astype(bool)
+        df['is_correct'] = (accessible & (df['current_auto_scan'] == target_auto_scan) &
+                            (df['current_times_per_day'] == target_times_per_day))
+        df['needs_update'] = accessible & ~df['is_correct']
+        return df
+
+# Shared across worker threads so concurrent checks and updates stay under the GeoEdge API rate
+API_RATE_LIMITER = RateLimiter(max_rate=int(os.getenv("GEOEDGE_API_MAX_RATE", "20")), time_period=1.0)
 
 # Page configuration
 st.set_page_config(
@@ -34,59 +129,106 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_projects_from_database(days_back=7, locations=None):
-    """Get projects from database with configurable lookback period"""
-    
-    host = os.getenv("MYSQL_HOST")
-    port = int(os.getenv("MYSQL_PORT", "3306"))
-    user = os.getenv("MYSQL_USER")
-    password = os.getenv("MYSQL_PASSWORD")
-    db = os.getenv("MYSQL_DB")
-
+@st.cache_resource
+def get_db_connection():
+    """Open the MySQL connection once (shared across reruns) together with a lock guarding its use"""
     conn = pymysql.connect(
-        host=host, port=port, user=user, password=password, database=db,
+        host=os.getenv("MYSQL_HOST"),
+        port=int(os.getenv("MYSQL_PORT", "3306")),
+        user=os.getenv("MYSQL_USER"),
+        password=os.getenv("MYSQL_PASSWORD"),
+        database=os.getenv("MYSQL_DB"),
         charset="utf8mb4", cursorclass=pymysql.cursors.DictCursor,
         autocommit=True, read_timeout=60, write_timeout=60,
     )
+    return conn, threading.Lock()
 
-    try:
-        with conn.cursor() as cursor:
-            # Build location filter
+@st.cache_data(ttl=300)  # Cache for 5 minutes
+def get_projects_from_database(days_back=7, exclude_config=None, all_locations=False):
+    """Get projects in any of AVAILABLE_LOCATIONS from database with configurable lookback period
+
+    The location selection is not part of the query, so one cached result serves every
+    combination of selected countries; callers narrow it with filter_projects_by_locations.
+    all_locations=True drops the country filter (an empty selection means "any location").
+
+    exclude_config: optional (auto_scan, times_per_day); projects whose mirrored settings in
+    geo_edge_projects already match it are filtered out in SQL.
+    """
+    conn, lock = get_db_connection()
+
+    with lock:
+        # Re-establish the shared connection if the server dropped it while idle
+        conn.ping(reconnect=True)
+        # Stream rows from the server instead of buffering the whole result set in the driver
+        with conn.cursor(pymysql.cursors.SSDictCursor) as cursor:
+            params = [days_back]
+            
+            # Build location filter (locations is a comma-separated list of country codes)
             location_filter = ""
-            if locations:
-                location_regex = "|".join(locations)
-                location_filter = f"AND CONCAT(',', REPLACE(COALESCE(p.locations, ''), ' ', ''), ',') REGEXP ',({location_regex}),' "
-            
+            if not all_locations:
+                location_filter = "AND (" + " OR ".join(
+                    ["FIND_IN_SET(%s, REPLACE(COALESCE(p.locations, ''), ' ', ''))"] * len(AVAILABLE_LOCATIONS)
+                ) + ") "
+                params.extend(AVAILABLE_LOCATIONS)
+            
+            # Skip projects the database already shows with the target configuration
+            config_filter = ""
+            if exclude_config is not None:
+                config_filter = "AND NOT (p.auto_scan <=> %s AND p.times_per_day <=> %s) "
+                params.extend(exclude_config)
+            
+            # EXISTS semi-join: one row per project however many ACTIVE instructions its
+            # campaign has, so no DISTINCT sort/dedup pass is needed
             sql = f"""
-                SELECT DISTINCT
+                SELECT
                     p.project_id,
                     p.campaign_id,
                     p.locations,
                     p.creation_date,
-                    sii.instruction_status
+                    'ACTIVE' AS instruction_status
                 FROM trc.geo_edge_projects AS p
-                JOIN trc.sp_campaign_inventory_instructions sii ON p.campaign_id = sii.campaign_id
-                WHERE sii.instruction_status = 'ACTIVE' 
-                  AND p.creation_date >= DATE_SUB(NOW(), INTERVAL {days_back} DAY)
+                WHERE EXISTS (
+                    SELECT 1 FROM trc.sp_campaign_inventory_instructions sii
+                    WHERE sii.campaign_id = p.campaign_id AND sii.instruction_status = 'ACTIVE'
+                )
+                  AND p.creation_date >= DATE_SUB(NOW(), INTERVAL %s DAY)
                   {location_filter}
+                  {config_filter}
                 ORDER BY p.creation_date DESC
             """
-            cursor.execute(sql)
-            results = cursor.fetchall()
-            return results
-    finally:
-        conn.close()
+            cursor.execute(sql, params)
+            return pd.DataFrame.from_records(
+                iter(cursor), columns=['project_id', 'campaign_id', 'locations', 'creation_date', 'instruction_status']
+            )
+
+def filter_projects_by_locations(projects_df, locations):
+    """Keep projects whose comma-separated locations include any of the given country codes"""
+    if not locations:
+        return projects_df
+    pattern = r"(?:^|,)(?:" + "|".join(map(re.escape, locations)) + r")(?:,|$)"
+    mask = projects_df['locations'].str.replace(' ', '', regex=False).str.contains(pattern, regex=True, na=False)
+    return projects_df[mask]
+
+def dedupe_projects(projects_df):
+    """Collapse rows sharing a project_id (one per campaign) into one row listing all its campaigns"""
+    if not projects_df['project_id'].duplicated().any():
+        return projects_df
+    return projects_df.groupby('project_id', sort=False, as_index=False).agg({
+        'campaign_id': lambda campaigns: ','.join(map(str, dict.fromkeys(campaigns))),
+        'locations': 'first',
+        'creation_date': 'max',
+        'instruction_status': 'first'
+    })
 
 def get_project_api_status(project_id):
     """Get project's current API settings"""
     try:
         url = f"{BASE_URL}/projects/{project_id}"
-        headers = {"Authorization": API_KEY}
         
-        response = requests.get(url, headers=headers, timeout=15)
+        API_RATE_LIMITER.acquire()
+        response = SESSION.get(url, timeout=15)
         if response.status_code == 200:
-            result = response.json()
+            result = json_loads(response.content)
             if 'response' in result and 'project' in result['response']:
                 project = result['response']['project']
                 
@@ -113,27 +255,104 @@ def get_project_api_status(project_id):
                 }
             
             # Log the issue for debugging
-            print(f"API Response missing project data: {result}")
+            logger.warning("API response missing project data for project %s", project_id)
+            logger.debug("Response body: %.256s", response.text)
             return {'auto_scan': 0, 'times_per_day': 0, 'project_name': 'Invalid Response Format', 'api_accessible': False}
         
         # Log HTTP errors
-        print(f"API Error: Status {response.status_code} for project {project_id}")
-        try:
-            error_detail = response.json()
-            print(f"Error details: {error_detail}")
-        except:
-            print("Could not parse error response")
-            
+        logger.warning("API error %s for project %s", response.status_code, project_id)
+        logger.debug("Error body: %.256s", response.text)
+        
         return {'auto_scan': 0, 'times_per_day': 0, 'project_name': f'HTTP Error: {response.status_code}', 'api_accessible': False}
     except Exception as e:
-        print(f"Exception in API call for {project_id}: {str(e)}")
+        logger.warning("Exception in API call for %s: %s", project_id, e)
         return {'auto_scan': 0, 'times_per_day': 0, 'project_name': f'Error: {str(e)}', 'api_accessible': False}
 
+class ApiStatusUnavailable(Exception):
+    """Raised inside the memoized lookup so failed API responses are never cached"""
+    def __init__(self, status):
+        super().__init__(status['project_name'])
+        self.status = status
+
+@st.cache_data(ttl=120, show_spinner=False)
+def cached_api_status(project_id):
+    """Get project's API settings, memoized across Streamlit reruns so widget changes don't re-fetch them"""
+    api_status = get_project_api_status(project_id)
+    if not api_status['api_accessible']:
+        raise ApiStatusUnavailable(api_status)
+    return api_status
+
+@st.cache_resource
+def get_status_cache():
+    """Open the SQLite status cache (shared across reruns and worker threads) and its lock"""
+    conn = sqlite3.connect(STATUS_CACHE_DB, check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS cfg ("
+        "project_id TEXT PRIMARY KEY, auto_scan INT, times_per_day INT, project_name TEXT, fetched_at REAL)"
+    )
+    conn.commit()
+    return conn, threading.Lock()
+
+def get_project_api_status_cached(project_id, target_auto_scan, target_times_per_day, ttl=STATUS_CACHE_TTL):
+    """Get project's API settings, skipping the API call when a fresh cache entry already matches the target"""
+    conn, lock = get_status_cache()
+    with lock:
+        row = conn.execute(
+            "SELECT auto_scan, times_per_day, project_name FROM cfg WHERE project_id = ? AND fetched_at > ?",
+            (project_id, time.time() - ttl)
+        ).fetchone()
+    if row and row[0] == target_auto_scan and row[1] == target_times_per_day:
+        return {'auto_scan': row[0], 'times_per_day': row[1], 'project_name': row[2], 'api_accessible': True}
+    
+    try:
+        api_status = cached_api_status(project_id)
+    except ApiStatusUnavailable as e:
+        return e.status
+    with lock:
+        conn.execute(
+            "INSERT OR REPLACE INTO cfg (project_id, auto_scan, times_per_day, project_name, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (project_id, api_status['auto_scan'], api_status['times_per_day'], api_status['project_name'], time.time())
+        )
+        conn.commit()
+    return api_status
+
+def invalidate_status_cache(project_id):
+    """Drop a project's cached API settings after they have been changed"""
+    try:
+        cached_api_status.clear(project_id)
+    except TypeError:
+        # Older Streamlit: cached .clear() takes no arguments, so drop every memoized status
+        cached_api_status.clear()
+    conn, lock = get_status_cache()
+    with lock:
+        conn.execute("DELETE FROM cfg WHERE project_id = ?", (project_id,))
+        conn.commit()
+
+def clear_status_cache():
+    """Forget every remembered API status, both the in-process memo and the SQLite cache"""
+    cached_api_status.clear()
+    conn, lock = get_status_cache()
+    with lock:
+        conn.execute("DELETE FROM cfg")
+        conn.commit()
+
+def iter_concurrent_api_calls(projects, api_call, *args):
+    """Run api_call(project_id, *args) for all projects concurrently, yielding (project, result) as each completes"""
+    # Workers share the script run context so the st.cache_data lookups they make are bound to this session
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=API_MAX_WORKERS,
+                            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as executor:
+        future_to_project = {
+            executor.submit(api_call, project['project_id'], *args): project
+            for project in projects
+        }
+        for future in as_completed(future_to_project):
+            yield future_to_project[future], future.result()
+
 def update_project_settings(project_id, auto_scan_value, times_per_day_value):
     """Update project settings via API"""
     try:
         url = f"{BASE_URL}/projects/{project_id}"
-        headers = {"Authorization": API_KEY, "Content-Type": "application/json"}
         
         # Ensure we're sending integers
         try:
@@ -152,29 +371,87 @@ def update_project_settings(project_id, auto_scan_value, times_per_day_value):
             "times_per_day": times_per_day_int
         }
         
-        print(f"Updating project {project_id} with data: {data}")
+        logger.debug("Updating project %s with data: %s", project_id, data)
         
-        # Use json parameter instead of data for proper JSON formatting
-        response = requests.put(url, headers=headers, json=data, timeout=15)
+        # Send the encoded JSON body with an explicit Content-Type
+        API_RATE_LIMITER.acquire()
+        response = SESSION.put(url, data=json_dumps(data), headers={"Content-Type": "application/json"}, timeout=15)
         if response.status_code == 200:
-            result = response.json()
+            result = json_loads(response.content)
             success = result.get('status', {}).get('code') == 'Success'
-            if success:
-                print(f"Successfully updated project {project_id}")
-            else:
-                print(f"Failed to update project {project_id}: {result}")
-            return success
+            if not success:
+                logger.warning("Failed to update project %s: %s", project_id, result)
+                return False
         else:
-            print(f"HTTP Error updating project {project_id}: Status {response.status_code}")
-            try:
-                error_detail = response.json()
-                print(f"Error details: {error_detail}")
-            except:
-                print("Could not parse error response")
+            logger.warning("HTTP error %s updating project %s", response.status_code, project_id)
+            logger.debug("Error body: %.256s", response.text)
             return False
     except Exception as e:
-        print(f"Exception updating project {project_id}: {str(e)}")
+        logger.warning("Exception updating project %s: %s", project_id, e)
         return False
+    
+    # Outside the try: a cache problem must not turn a successful PUT into a reported failure
+    invalidate_status_cache(project_id)
+    logger.debug("Successfully updated project %s", project_id)
+    return True
+
+def reconcile_project(project_id, target_auto_scan, target_times_per_day):
+    """Check a project's API settings and update it straight away if they differ from the target.
+
+    Returns (api_status, outcome) where outcome is 'correct', 'updated', 'failed' or 'error'.
+    """
+    api_status = get_project_api_status_cached(project_id, target_auto_scan, target_times_per_day)
+    if not api_status['api_accessible']:
+        return api_status, 'error'
+    if (api_status['auto_scan'] == target_auto_scan and
+            api_status['times_per_day'] == target_times_per_day):
+        return api_status, 'correct'
+    if update_project_settings(project_id, target_auto_scan, target_times_per_day):
+        return api_status, 'updated'
+    return api_status, 'failed'
+
+def push_project_settings(project_id, target_auto_scan, target_times_per_day):
+    """Update a project to the target without checking it first; returns (api_status, outcome) like reconcile_project"""
+    if update_project_settings(project_id, target_auto_scan, target_times_per_day):
+        return {'auto_scan': target_auto_scan, 'times_per_day': target_times_per_day,
+                'project_name': 'Updated', 'api_accessible': True}, 'updated'
+    return {'auto_scan': 0, 'times_per_day': 0, 'project_name': 'Update Failed', 'api_accessible': False}, 'failed'
+
+def sample_mismatch_rate(projects, target_auto_scan, target_times_per_day):
+    """Check the first STATUS_SAMPLE_SIZE projects and return the share of reachable ones not at the target"""
+    sample_statuses = [
+        api_status for _, api_status in iter_concurrent_api_calls(
+            projects[:STATUS_SAMPLE_SIZE], get_project_api_status_cached, target_auto_scan, target_times_per_day)
+        if api_status['api_accessible']
+    ]
+    if not sample_statuses:
+        return 0.0
+    mismatches = sum(1 for api_status in sample_statuses
+                     if (api_status['auto_scan'], api_status['times_per_day']) != (target_auto_scan, target_times_per_day))
+    return mismatches / len(sample_statuses)
+
+@st.cache_data(show_spinner=False)
+def build_projects_table(df_status):
+    """Build the Projects Table display DataFrame with a leading per-row status marker column"""
+    display_df = df_status[['project_id', 'campaign_id', 'locations', 'creation_date', 'status', 
+                            'current_auto_scan', 'current_times_per_day', 'is_correct']].copy()
+    
+    display_df.columns = ['Project ID', 'Campaign ID', 'Locations', 'Created', 'Status', 
+                         'Auto Scan', 'Times/Day', 'Correct Config']
+    
+    # Mark each row green when correct, red for API errors and yellow when an update
+    # is needed; plain data the frontend renders directly, with no Styler CSS
+    correct = display_df['Correct Config'].to_numpy(dtype=bool)
+    api_ok = df_status['api_accessible'].to_numpy(dtype=bool)
+    display_df.insert(0, 'Status Color', np.where(correct, '🟢 OK', np.where(~api_ok, '🔴 API Error', '🟡 Needs Update')))
+    return display_df
+
+@st.cache_data(show_spinner=False)
+def status_csv_bytes(df_status):
+    """Serialize the status DataFrame to CSV bytes for the download button"""
+    buf = io.BytesIO()
+    df_status.to_csv(buf, index=False)
+    return buf.getvalue()
 
 def main():
     st.title("🎯 GeoEdge Project Manager")
@@ -193,11 +470,10 @@ def main():
     )
     
     # Location filter
-    available_locations = ['IT', 'FR', 'DE', 'ES']
     selected_locations = st.sidebar.multiselect(
         "🌍 Target Locations",
-        available_locations,
-        default=available_locations,
+        AVAILABLE_LOCATIONS,
+        default=AVAILABLE_LOCATIONS,
         help="Select which countries to include"
     )
     
@@ -206,12 +482,34 @@ def main():
     target_auto_scan = st.sidebar.number_input("Auto Scan Value", min_value=0, max_value=1, value=1)
     target_times_per_day = st.sidebar.number_input("Times Per Day Value", min_value=0, max_value=1000, value=72)
     
+    skip_db_correct = st.sidebar.checkbox(
+        "⚡ Skip projects already correct in database",
+        value=False,
+        help="Filter out projects whose database settings already match the target, so they are never sent to the API"
+    )
+    
+    force_refresh = st.sidebar.checkbox(
+        "🔄 Force refresh API status",
+        value=False,
+        help="Discard API settings remembered from earlier runs and fetch every project again"
+    )
+    if force_refresh:
+        clear_status_cache()
+    
     # Main content
     st.header(f"📋 Projects from Last {days_back} Days")
     
     # Load projects
     with st.spinner("🔍 Fetching projects from database..."):
-        projects = get_projects_from_database(days_back, selected_locations)
+        exclude_config = (target_auto_scan, target_times_per_day) if skip_db_correct else None
+        # No countries selected means no location filter at all, not "only AVAILABLE_LOCATIONS"
+        projects_df = filter_projects_by_locations(
+            get_projects_from_database(days_back, exclude_config, all_locations=not selected_locations),
+            selected_locations
+        )
+        # One row per project, so no project is sent to the API more than once
+        projects_df = dedupe_projects(projects_df)
+        projects = projects_df.to_dict('records')
     
     if not projects:
         st.warning(f"No projects found for the last {days_back} days with selected criteria.")
@@ -222,11 +520,10 @@ def main():
     # Display initial projects table (database data only)
     st.header("📋 Projects Table (Database Data)")
     
-    # Convert to DataFrame for initial display
-    initial_df = pd.DataFrame(projects)
-    display_columns = ['project_id', 'campaign_id', 'locations', 'creation_date', 'instruction_status']
-    display_df = initial_df[display_columns].copy()
-    display_df.columns = ['Project ID', 'Campaign ID', 'Locations', 'Created', 'Status']
+    display_df = projects_df.rename(columns={
+        'project_id': 'Project ID', 'campaign_id': 'Campaign ID', 'locations': 'Locations',
+        'creation_date': 'Created', 'instruction_status': 'Status'
+    })
     
     st.dataframe(display_df, width="stretch", height=400)
     
@@ -309,243 +606,179 @@ def main():
     st.header("📊 Real-time Results")
     results_placeholder = st.empty()
     
-    projects_with_status = []
-    correct_count = 0
+    RESULTS_TABLE_COLUMNS = ['project_id', 'campaign_id', 'locations', 'current_auto_scan', 'current_times_per_day', 'is_correct']
+    RESULTS_TABLE_LABELS = {
+        'project_id': 'Project ID', 'campaign_id': 'Campaign ID', 'locations': 'Countries',
+        'current_auto_scan': 'Auto Scan', 'current_times_per_day': 'Times/Day', 'is_correct': 'Status'
+    }
+    
+    projects_with_status = StatusBuffer()
     updated_count = 0
     
     # Function to update the real-time results table
-    def update_results_table():
-        if projects_with_status:
+    def update_results_table(df=None):
+        if df is None and projects_with_status:
             # Convert to DataFrame for display
-            df = pd.DataFrame(projects_with_status)
-            display_df = df[['project_id', 'campaign_id', 'locations', 'current_auto_scan', 'current_times_per_day', 'is_correct']].copy()
-            display_df.columns = ['Project ID', 'Campaign ID', 'Countries', 'Auto Scan', 'Times/Day', 'Status']
-            
-            # Add status indicators
-            display_df['Status'] = display_df['Status'].map({True: '✅ Correct', False: '⚠️ Needs Update'})
-            
-            # Color-code the dataframe
-            def highlight_status(row):
-                if '✅' in str(row['Status']):
-                    return ['background-color: #90EE90'] * len(row)  # Light green
-                else:
-                    return ['background-color: #FFFFE0'] * len(row)  # Light yellow
+            df = projects_with_status.to_df(target_auto_scan, target_times_per_day)
+        if df is not None and not df.empty:
+            correct_count = int(df['is_correct'].sum())
+            display_df = df[RESULTS_TABLE_COLUMNS].rename(columns=RESULTS_TABLE_LABELS)
             
-            styled_df = display_df.style.apply(highlight_status, axis=1)
+            # Add status indicators; the emoji marks each row, so no per-cell styling is needed
+            display_df['Status'] = np.where(display_df['Status'].astype(bool), '✅ Correct', '⚠️ Needs Update')
             
             # Update the table
             with results_placeholder.container():
-                st.dataframe(styled_df, width="stretch", height=min(400, len(display_df) * 35 + 50))
+                st.dataframe(
+                    display_df,
+                    width="stretch",
+                    height=min(400, len(display_df) * 35 + 50),
+                    hide_index=True,
+                    column_config={'Status': st.column_config.TextColumn('Status', width='small')}
+                )
                 st.caption(f"📊 Processed: {len(projects_with_status)}/{len(projects_to_check)} | ✅ Correct: {correct_count}")
     
-    if action_type == 'update' or action_type == 'smart_update':
-        projects_needing_update = []
-        processed_count = 0
+    # Repaint the live table at most every RESULTS_REPAINT_INTERVAL seconds so the
+    # cost of redrawing stays constant no matter how fast results arrive
+    last_paint = [0.0]
+    def maybe_update_results_table():
+        now = time.monotonic()
+        if now - last_paint[0] < RESULTS_REPAINT_INTERVAL:
+            return
+        last_paint[0] = now
+        update_results_table()
+    
+    if action_type == 'smart_update':
+        # Check and update in a single pass: each worker issues its PUT as soon as its
+        # GET shows the project needs changes, so there is no separate update phase
+        already_correct_count = 0
+        failed_count = 0
         
-        # For smart_update, we first check which projects actually need updates
-        if action_type == 'smart_update':
-            st.info("🔍 First checking which projects need updates...")
+        # When a sample shows nearly every project is off target, checking the rest is
+        # wasted round-trips: update everything directly. Otherwise the sampled statuses
+        # stay cached, so the full pass does not fetch them again.
+        project_action = reconcile_project
+        if len(projects_to_check) > STATUS_SAMPLE_SIZE:
+            if sample_mismatch_rate(projects_to_check, target_auto_scan, target_times_per_day) >= SAMPLE_MISMATCH_RATE:
+                project_action = push_project_settings
+                st.info(f"⚡ Nearly all of the first {STATUS_SAMPLE_SIZE} projects need an update - updating all projects without checking them first")
+        
+        for i, (project, (api_status, outcome)) in enumerate(
+                iter_concurrent_api_calls(projects_to_check, project_action, target_auto_scan, target_times_per_day)):
+            project_id = project['project_id']
             
-            # Process all projects to determine which need updates
-            for i, project in enumerate(projects_to_check):
-                project_id = project['project_id']
-                processed_count += 1
-                
-                # Update checking progress
-                progress = (i + 1) / len(projects_to_check)
-                progress_bar.progress(progress, text=f"Checking: {i+1}/{len(projects_to_check)} projects")
-                
-                # Show current project being checked
-                status_text.markdown(f"**🔍 Currently checking:** `{project_id}`")
-                details_text.markdown(f"📊 Campaign: `{project.get('campaign_id', 'N/A')}` | 🌍 Countries: `{project.get('locations', 'N/A')}`")
-                
-                # Check API status
-                api_status = get_project_api_status(project_id)
-                
-                if api_status['api_accessible']:
-                    # Determine if configuration is correct or needs update
-                    needs_update = (api_status['auto_scan'] != target_auto_scan or 
-                                   api_status['times_per_day'] != target_times_per_day)
-                    
-                    if needs_update:
-                        projects_needing_update.append({
-                            'project_id': project_id,
-                            'campaign_id': project.get('campaign_id', 'N/A'),
-                            'locations': project.get('locations', 'N/A'),
-                            'current_auto_scan': api_status['auto_scan'],
-                            'current_times_per_day': api_status['times_per_day']
-                        })
-                        
-                        # Add to results display but mark as needing update
-                        project_data = {
-                            'project_id': project_id,
-                            'campaign_id': project.get('campaign_id', 'N/A'),
-                            'locations': project.get('locations', 'N/A'),
-                            'creation_date': project.get('creation_date', 'N/A'),
-                            'status': project.get('instruction_status', 'ACTIVE'),
-                            'project_name': api_status['project_name'],
-                            'current_auto_scan': api_status['auto_scan'],
-                            'current_times_per_day': api_status['times_per_day'],
-                            'api_accessible': api_status['api_accessible'],
-                            'is_correct': False,
-                            'needs_update': True
-                        }
-                        projects_with_status.append(project_data)
-                    else:
-                        # Project is already correctly configured - add to results
-                        project_data = {
-                            'project_id': project_id,
-                            'campaign_id': project.get('campaign_id', 'N/A'),
-                            'locations': project.get('locations', 'N/A'),
-                            'creation_date': project.get('creation_date', 'N/A'),
-                            'status': project.get('instruction_status', 'ACTIVE'),
-                            'project_name': api_status['project_name'],
-                            'current_auto_scan': api_status['auto_scan'],
-                            'current_times_per_day': api_status['times_per_day'],
-                            'api_accessible': api_status['api_accessible'],
-                            'is_correct': True,
-                            'needs_update': False
-                        }
-                        projects_with_status.append(project_data)
-                else:
-                    # API not accessible - add to results with error status
-                    project_data = {
-                        'project_id': project_id,
-                        'campaign_id': project.get('campaign_id', 'N/A'),
-                        'locations': project.get('locations', 'N/A'),
-                        'creation_date': project.get('creation_date', 'N/A'),
-                        'status': project.get('instruction_status', 'ACTIVE'),
-                        'project_name': api_status['project_name'],
-                        'current_auto_scan': api_status['auto_scan'],
-                        'current_times_per_day': api_status['times_per_day'],
-                        'api_accessible': False,
-                        'is_correct': False,
-                        'needs_update': False
-                    }
-                    projects_with_status.append(project_data)
-                
-                # Update the real-time table during checking
-                if i % 5 == 0:  # Update table every 5 projects to avoid too many refreshes
-                    update_results_table()
-                
-                time.sleep(0.1)
+            # Update progress
+            progress = (i + 1) / len(projects_to_check)
+            progress_bar.progress(progress, text=f"Progress: {i+1}/{len(projects_to_check)} projects checked")
             
-            # Show results of the check
-            st.success(f"✅ Check complete! Found {len(projects_needing_update)} projects that need updates.")
+            # Show last project processed
+            status_text.markdown(f"**🚀 Last processed:** `{project_id}`")
+            details_text.markdown(f"📊 Campaign: `{project.get('campaign_id', 'N/A')}` | 🌍 Countries: `{project.get('locations', 'N/A')}`")
             
-            # Reset for update phase
-            projects_to_check = projects_needing_update
-            progress_bar.progress(0)
+            project_name = api_status['project_name']
+            current_auto_scan = api_status['auto_scan']
+            current_times_per_day = api_status['times_per_day']
             
-        # Update only projects that need it (all for regular update, or filtered list for smart update)
-        total_to_update = len(projects_to_check)
+            if outcome == 'correct':
+                already_correct_count += 1
+            elif outcome == 'updated':
+                updated_count += 1
+                project_name = 'Updated'
+                current_auto_scan = target_auto_scan
+                current_times_per_day = target_times_per_day
+            elif outcome == 'failed':
+                failed_count += 1
+                project_name = 'Update Failed'
+            
+            projects_with_status.append(
+                project_id=project_id,
+                campaign_id=project.get('campaign_id', 'N/A'),
+                locations=project.get('locations', 'N/A'),
+                creation_date=project.get('creation_date', 'N/A'),
+                status=project.get('instruction_status', 'ACTIVE'),
+                project_name=project_name,
+                current_auto_scan=current_auto_scan,
+                current_times_per_day=current_times_per_day,
+                api_accessible=api_status['api_accessible']
+            )
+            
+            # Update the real-time table, throttled to avoid too many refreshes
+            maybe_update_results_table()
         
-        if total_to_update == 0:
+        if updated_count == 0 and failed_count == 0:
             st.success("✅ All projects already have the correct configuration! No updates needed.")
-            return
         
+    elif action_type == 'update':
+        # Update every project to the target configuration (PUTs run concurrently over the pooled session)
+        total_to_update = len(projects_to_check)
         st.info(f"🚀 Updating {total_to_update} projects...")
         
-        # Reset projects_with_status if we're doing smart update since we want fresh data
-        if action_type == 'smart_update':
-            projects_with_status = []
-            
-        for i, project in enumerate(projects_to_check):
+        for i, (project, success) in enumerate(
+                iter_concurrent_api_calls(projects_to_check, update_project_settings, target_auto_scan, target_times_per_day)):
             project_id = project['project_id']
             
             # Update progress
             progress = (i + 1) / total_to_update
             progress_bar.progress(progress, text=f"Progress: {i+1}/{total_to_update} projects updated")
             
-            # Show current project being updated
-            status_text.markdown(f"**🚀 Currently updating:** `{project_id}`")
+            # Show last project updated
+            status_text.markdown(f"**🚀 Last updated:** `{project_id}`")
             details_text.markdown(f"📊 Campaign: `{project.get('campaign_id', 'N/A')}` | 🌍 Countries: `{project.get('locations', 'N/A')}`")
             
-            # Perform update
-            if update_project_settings(project_id, target_auto_scan, target_times_per_day):
+            # On success record the target settings, otherwise a failed row
+            if success:
                 updated_count += 1
-                # Create project data assuming successful update
-                project_data = {
-                    'project_id': project_id,
-                    'campaign_id': project.get('campaign_id', 'N/A'),
-                    'locations': project.get('locations', 'N/A'),
-                    'creation_date': project.get('creation_date', 'N/A'),
-                    'status': project.get('instruction_status', 'ACTIVE'),
-                    'project_name': 'Updated',
-                    'current_auto_scan': target_auto_scan,
-                    'current_times_per_day': target_times_per_day,
-                    'api_accessible': True,
-                    'is_correct': True,
-                    'needs_update': False
-                }
-                correct_count += 1
-            else:
-                # Failed update
-                project_data = {
-                    'project_id': project_id,
-                    'campaign_id': project.get('campaign_id', 'N/A'),
-                    'locations': project.get('locations', 'N/A'),
-                    'creation_date': project.get('creation_date', 'N/A'),
-                    'status': project.get('instruction_status', 'ACTIVE'),
-                    'project_name': 'Update Failed',
-                    'current_auto_scan': 0,
-                    'current_times_per_day': 0,
-                    'api_accessible': False,
-                    'is_correct': False,
-                    'needs_update': True
-                }
             
-            projects_with_status.append(project_data)
-            
-            # Update the real-time table
-            update_results_table()
-            
-            time.sleep(0.5)  # Longer delay for updates
+            projects_with_status.append(
+                project_id=project_id,
+                campaign_id=project.get('campaign_id', 'N/A'),
+                locations=project.get('locations', 'N/A'),
+                creation_date=project.get('creation_date', 'N/A'),
+                status=project.get('instruction_status', 'ACTIVE'),
+                project_name='Updated' if success else 'Update Failed',
+                current_auto_scan=target_auto_scan if success else 0,
+                current_times_per_day=target_times_per_day if success else 0,
+                api_accessible=success
+            )
+            
+            # Update the real-time table, throttled to avoid too many refreshes
+            maybe_update_results_table()
         
     else:
-        # Check current configuration first
-        for i, project in enumerate(projects_to_check):
+        # Check current configuration first (API calls run concurrently)
+        for i, (project, api_status) in enumerate(iter_concurrent_api_calls(projects_to_check, get_project_api_status_cached, target_auto_scan, target_times_per_day)):
             project_id = project['project_id']
             
             # Update progress with enhanced display
             progress = (i + 1) / len(projects_to_check)
             progress_bar.progress(progress, text=f"Progress: {i+1}/{len(projects_to_check)} projects checked")
             
-            # Show current project being checked
-            status_text.markdown(f"**🔍 Currently checking:** `{project_id}`")
+            # Show last project checked
+            status_text.markdown(f"**🔍 Last checked:** `{project_id}`")
             details_text.markdown(f"📊 Campaign: `{project.get('campaign_id', 'N/A')}` | 🌍 Countries: `{project.get('locations', 'N/A')}`")
             
-            # Get API status
-            api_status = get_project_api_status(project_id)
-            
-            # Determine if configuration is correct
-            is_correct = (api_status['auto_scan'] == target_auto_scan and 
-                         api_status['times_per_day'] == target_times_per_day)
-            
-            if is_correct:
-                correct_count += 1
-            
-            # Combine data
-            project_data = {
-                'project_id': project_id,
-                'campaign_id': project['campaign_id'],
-                'locations': project['locations'],
-                'creation_date': project['creation_date'],
-                'status': project['instruction_status'],
-                'project_name': api_status['project_name'],
-                'current_auto_scan': api_status['auto_scan'],
-                'current_times_per_day': api_status['times_per_day'],
-                'api_accessible': api_status['api_accessible'],
-                'is_correct': is_correct,
-                'needs_update': not is_correct and api_status['api_accessible']
-            }
-            
-            projects_with_status.append(project_data)
-            
-            # Update the real-time table
-            update_results_table()
-            
-            time.sleep(0.1)  # Small delay to avoid rate limiting
+            # Combine data; correctness is derived for all rows at once when the DataFrame is built
+            projects_with_status.append(
+                project_id=project_id,
+                campaign_id=project['campaign_id'],
+                locations=project['locations'],
+                creation_date=project['creation_date'],
+                status=project['instruction_status'],
+                project_name=api_status['project_name'],
+                current_auto_scan=api_status['auto_scan'],
+                current_times_per_day=api_status['times_per_day'],
+                api_accessible=api_status['api_accessible']
+            )
+            
+            # Update the real-time table, throttled to avoid too many refreshes
+            maybe_update_results_table()
+    
+    # Build the results DataFrame once; the final table repaint and all summary counters use it
+    df_status = projects_with_status.to_df(target_auto_scan, target_times_per_day)
+    update_results_table(df_status)
+    correct_count = int(df_status['is_correct'].sum())
+    needs_update_count = int(df_status['needs_update'].sum()) if not df_status.empty else 0
+    api_error_count = int((~df_status['api_accessible'].astype(bool)).sum()) if not df_status.empty else 0
     
     # Clear progress indicators and show completion
     if action_type == 'update':
@@ -556,13 +789,8 @@ def main():
         progress_bar.progress(1.0, text=f"✅ Completed! Updated {updated_count} projects")
         status_text.markdown(f"**🎉 Smart Update Complete!**")
         
-        # Calculate how many projects were already correctly configured
-        # Use total_original_projects since projects_to_check may have been filtered
-        total_needing_update = len([p for p in projects_with_status if p.get('needs_update', False)])
-        already_correct = total_original_projects - total_needing_update
-        
         # Show both updated count and already correct count
-        details_text.markdown(f"📊 **Results:** {updated_count} successfully updated, {already_correct} already correctly configured")
+        details_text.markdown(f"📊 **Results:** {updated_count} successfully updated, {already_correct_count} already correctly configured")
     else:
         progress_bar.progress(1.0, text=f"✅ Completed! Checked {len(projects_to_check)} projects")
         status_text.markdown(f"**🎉 API Status Check Complete!**")
@@ -599,12 +827,9 @@ def main():
         
         with col3:
             # For smart update, we show how many projects didn't need updating
-            total_needing_update = len([p for p in projects_with_status if p.get('needs_update', False)])
-            already_correct = total_projects - total_needing_update
-            st.metric("✓ Already Correct", already_correct)
+            st.metric("✓ Already Correct", already_correct_count)
         
         with col4:
-            api_error_count = len([p for p in projects_with_status if not p.get('api_accessible', True)])
             st.metric("⚠️ API Errors", api_error_count)
     else:
         # Regular check operation metrics
@@ -616,17 +841,12 @@ def main():
             st.metric("✅ Correctly Configured", correct_count, delta=f"{percent_correct:.1f}%")
         
         with col3:
-            needs_update_count = len([p for p in projects_with_status if p.get('needs_update', False)])
             st.metric("🔧 Needs Update", needs_update_count)
         
         with col4:
-            api_error_count = len([p for p in projects_with_status if not p.get('api_accessible', True)])
             st.metric("⚠️ API Errors", api_error_count)
     
     # Configuration Update Section
-    # Calculate needs_update_count for all action types
-    needs_update_count = len([p for p in projects_with_status if p.get('needs_update', False)])
-    
     if needs_update_count > 0:
         st.header("🔧 Update Configuration")
         
@@ -639,28 +859,19 @@ def main():
             updated_count = 0
             failed_count = 0
             
-            projects_to_update = [p for p in projects_with_status if p.get('needs_update', False)]
+            projects_to_update = df_status.loc[df_status['needs_update'].astype(bool), ['project_id']].to_dict('records')
             
-            for i, project in enumerate(projects_to_update):
-                project_id = project['project_id']
-                
+            for i, (project, success) in enumerate(
+                    iter_concurrent_api_calls(projects_to_update, update_project_settings, target_auto_scan, target_times_per_day)):
                 # Update progress
                 progress = (i + 1) / len(projects_to_update)
                 update_progress.progress(progress)
-                update_status.text(f"Updating project {i+1}/{len(projects_to_update)}: {project_id[:12]}...")
+                update_status.text(f"Updated project {i+1}/{len(projects_to_update)}: {project['project_id'][:12]}...")
                 
-                # Perform update
-                if update_project_settings(project_id, target_auto_scan, target_times_per_day):
+                if success:
                     updated_count += 1
-                    # Update the project status in our data
-                    project['current_auto_scan'] = target_auto_scan
-                    project['current_times_per_day'] = target_times_per_day
-                    project['is_correct'] = True
-                    project['needs_update'] = False
                 else:
                     failed_count += 1
-                
-                time.sleep(0.5)  # Delay between updates
             
             # Clear progress indicators
             update_progress.empty()
@@ -678,46 +889,36 @@ def main():
     # Projects Table
     st.header("📋 Projects Table")
     
-    # Convert to DataFrame for display
-    df = pd.DataFrame(projects_with_status)
+    df = df_status
     
-    # Prepare display DataFrame
-    display_df = df[['project_id', 'campaign_id', 'locations', 'creation_date', 'status', 
-                    'current_auto_scan', 'current_times_per_day', 'is_correct']].copy()
+    # Prepare display DataFrame (reused across reruns while the statuses are unchanged)
+    display_df = build_projects_table(df)
     
-    display_df.columns = ['Project ID', 'Campaign ID', 'Locations', 'Created', 'Status', 
-                         'Auto Scan', 'Times/Day', 'Correct Config']
-    
-    # Color-code the dataframe
-    def highlight_correct_config(row):
-        if row['Correct Config']:
-            return ['background-color: #90EE90'] * len(row)  # Light green
-        elif not df.loc[row.name, 'api_accessible']:
-            return ['background-color: #FFB6C1'] * len(row)  # Light red for API errors
-        else:
-            return ['background-color: #FFFFE0'] * len(row)  # Light yellow for needs update
-    
-    styled_df = display_df.style.apply(highlight_correct_config, axis=1)
-    
-    st.dataframe(styled_df, width="stretch", height=400)
+    st.dataframe(
+        display_df,
+        width="stretch",
+        height=400,
+        hide_index=True,
+        column_config={
+            'Status Color': st.column_config.TextColumn('Config', help='Configuration status against the target')
+        }
+    )
     
     # Legend
     st.markdown("""
-    **Color Legend:**
-    - 🟢 **Green**: Correctly configured projects
-    - 🟡 **Yellow**: Projects that need updates
-    - 🔴 **Red**: Projects with API access issues
+    **Config Legend:**
+    - 🟢 **OK**: Correctly configured projects
+    - 🟡 **Needs Update**: Projects that need updates
+    - 🔴 **API Error**: Projects with API access issues
     """)
     
-    # Download option
-    if st.button("📥 Download Report as CSV"):
-        csv = df.to_csv(index=False)
-        st.download_button(
-            label="Download CSV",
-            data=csv,
-            file_name=f"geoedge_projects_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+    # Download option (serialized once per distinct status table)
+    st.download_button(
+        label="📥 Download Report as CSV",
+        data=status_csv_bytes(df),
+        file_name=f"geoedge_projects_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv"
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -110,9 +110,9 @@ def generate_enhanced_email_report(status_changes: Dict = None):
     except Exception as e:
         print(f"❌ Error sending enhanced email report: {e}")
 
-def create_detection_queries_file():
+def create_detection_queries_file(path: str = "deactivation_queries.sql"):
     """
-    Create SQL queries file for manual investigation
+    Create SQL queries file for manual investigation at the given path
     """
     queries_content = """
 -- ====================================
@@ -194,10 +194,10 @@ ORDER BY update_time DESC
 LIMIT 50;
 """
     
-    with open("/Users/gaurav.k/Desktop/geoedge-country-projects/deactivation_queries.sql", "w") as f:
-        f.write(queries_content)
+    with open(path, "wb", buffering=1 << 16) as f:
+        f.write(queries_content.encode("utf-8"))
     
-    print(f"✅ SQL queries file created: deactivation_queries.sql")
+    print(f"✅ SQL queries file created: {path}")
 
 def main():
     """
@@ -4,9 +4,16 @@ Test script to explore GeoEdge location targeting options
 """
 
 import json
+import re
 from geoedge_projects.client import GeoEdgeClient
 
-def explore_geoedge_locations():
+# City names recognised in location descriptions, matched together in one regex scan
+CITY_KEYWORDS = frozenset({'new york', 'los angeles', 'chicago', 'miami', 'boston',
+                           'seattle', 'atlanta', 'dallas', 'denver', 'portland'})
+US_CITY_KEYWORDS = frozenset({'los angeles', 'chicago', 'miami', 'boston', 'seattle'})
+CITY_PATTERN = re.compile("|".join(map(re.escape, sorted(CITY_KEYWORDS))))
+
+def explore_geoedge_locations(output_path: str = "geoedge_locations.json"):
     """Check what location targeting options are available in GeoEdge API"""
     try:
         client = GeoEdgeClient()
@@ -27,18 +34,28 @@ def explore_geoedge_locations():
         # Sort by ID for better organization
         sorted_locations = sorted(locations.items(), key=lambda x: str(x[0]))
         
-        # Categorize locations
+        # Categorize locations and collect targeting candidates in a single pass
         countries = []
         cities = []
         regions = []
         others = []
+        ny_locations = []
+        us_cities = []
         
         for loc_id, description in sorted_locations:
             print(f"ID: {loc_id:15} | Description: {description}")
             
-            # Categorize based on description patterns
             desc_lower = description.lower()
-            if any(city in desc_lower for city in ['new york', 'los angeles', 'chicago', 'miami', 'boston', 'seattle', 'atlanta', 'dallas', 'denver', 'portland']):
+            city_hits = CITY_PATTERN.findall(desc_lower)
+            
+            # Targeting candidates: New York and other major US cities
+            if 'new york' in desc_lower or 'ny' in desc_lower:
+                ny_locations.append((loc_id, description))
+            if US_CITY_KEYWORDS.intersection(city_hits):
+                us_cities.append((loc_id, description))
+            
+            # Categorize based on description patterns
+            if city_hits:
                 cities.append((loc_id, description))
             elif len(description) == 2 and description.isupper():  # Country codes like US, UK, DE
                 countries.append((loc_id, description))
@@ -80,7 +97,6 @@ def explore_geoedge_locations():
         print("=" * 60)
         
         # Look for New York specifically
-        ny_locations = [(loc_id, desc) for loc_id, desc in sorted_locations if 'new york' in desc.lower() or 'ny' in desc.lower()]
         if ny_locations:
             print("✅ NEW YORK TARGETING AVAILABLE:")
             for loc_id, desc in ny_locations:
@@ -90,18 +106,16 @@ def explore_geoedge_locations():
             print("💡 You may need to use 'US' for United States targeting")
         
         # Look for other major US cities
-        us_cities = [(loc_id, desc) for loc_id, desc in sorted_locations 
-                    if any(city in desc.lower() for city in ['los angeles', 'chicago', 'miami', 'boston', 'seattle'])]
         if us_cities:
             print("\n✅ OTHER US CITIES AVAILABLE:")
             for loc_id, desc in us_cities[:5]:
                 print(f"   🏙️  Use location_id: '{loc_id}' for '{desc}'")
         
         # Save complete list to file for reference
-        with open('/Users/gaurav.k/Desktop/geoedge-country-projects/geoedge_locations.json', 'w') as f:
+        with open(output_path, 'w') as f:
             json.dump(locations, f, indent=2, sort_keys=True)
         
-        print(f"\n💾 Complete location list saved to 'geoedge_locations.json'")
+        print(f"\n💾 Complete location list saved to '{output_path}'")
         print(f"\n📋 USAGE IN DASHBOARD:")
         print("   - Update the alerts dashboard to use these location_ids")
         print("   - Replace country dropdowns with city-level targeting")
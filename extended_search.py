@@ -1,14 +1,29 @@
 import os
+import re
 import sys
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
 from dotenv import load_dotenv
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 load_dotenv()
 
+CHUNK_WORKERS = 4  # Date ranges fetched concurrently
+PAGE_PREFETCH = 4  # Pages of one date range requested concurrently after the first
+
+# One keep-alive session for every page request, so TLS connections are reused across chunks
+SESSION = requests.Session()
+SESSION.headers.update({"Content-Type": "application/json"})
+_adapter = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=CHUNK_WORKERS * PAGE_PREFETCH,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
 # Accounts and expected alert types
 ACCOUNT_ALERTS = {
     "1798665": "deceptive site",
@@ -19,9 +34,30 @@ ACCOUNT_ALERTS = {
     "1929299": "malicious cloaking"
 }
 
-alerts_lock = threading.Lock()
-all_alerts = []
-found_accounts = {}
+# Numeric tokens are pulled out in one regex pass and intersected with the target IDs
+ACCOUNT_ID_SET = frozenset(ACCOUNT_ALERTS)
+ID_TOKEN_PATTERN = re.compile(r"(?<!\d)\d{6,8}(?!\d)")
+
+# Text fields of an alert that can mention an account ID
+ALERT_TEXT_FIELDS = ('alert_name', 'trigger_metadata')
+
+def alert_id_text(alert) -> str:
+    """Join the parts of an alert that can carry an account ID into one searchable string."""
+    parts = [str(alert.get(field) or '') for field in ALERT_TEXT_FIELDS]
+    # Account IDs live on the nested publisher/syndicator objects
+    for key in ('publisher', 'syndicator'):
+        nested = alert.get(key)
+        if isinstance(nested, dict):
+            parts.append(str(nested.get('id') or ''))
+    # project_name maps project IDs to names; both sides can embed campaign/account IDs
+    project_name = alert.get('project_name')
+    if isinstance(project_name, dict):
+        for project_key, name in project_name.items():
+            parts.append(str(project_key))
+            parts.append(str(name))
+    elif project_name:
+        parts.append(str(project_name))
+    return "|".join(parts)
 
 def _env_or_fail(key: str) -> str:
     value = os.getenv(key, "").strip()
@@ -29,8 +65,72 @@ def _env_or_fail(key: str) -> str:
         raise RuntimeError(f"Missing required environment variable: {key}")
     return value
 
+def match_alerts(alerts, thread_id: int, found_accounts: dict):
+    """Search one page of alerts for target accounts and alert types, recording matches in found_accounts."""
+    for alert in alerts:
+        # Check if any account ID appears in the fields that carry one (no serialization of the whole alert)
+        haystack = alert_id_text(alert)
+        account_hits = ACCOUNT_ID_SET.intersection(ID_TOKEN_PATTERN.findall(haystack))
+        if not account_hits:
+            continue
+        
+        alert_name = alert.get('alert_name', '').lower()
+        trigger_metadata = alert.get('trigger_metadata', '').lower()
+        
+        for account_id in account_hits:
+            expected_alert_type = ACCOUNT_ALERTS[account_id]
+            
+            # Also check if the expected alert type appears
+            alert_type_match = False
+            if expected_alert_type == "deceptive site":
+                alert_type_match = "deceptive" in alert_name or "deceptive" in trigger_metadata
+            elif expected_alert_type == "malicious domain":
+                alert_type_match = "malicious domain" in trigger_metadata
+            elif expected_alert_type == "financial scam":
+                alert_type_match = "financial" in trigger_metadata
+            elif expected_alert_type == "malicious cloaking":
+                alert_type_match = "cloaking" in trigger_metadata
+            
+            found_accounts.setdefault(account_id, []).append({
+                'thread': thread_id,
+                'alert': alert,
+                'expected_type': expected_alert_type,
+                'alert_type_match': alert_type_match,
+                'actual_alert_name': alert.get('alert_name', ''),
+                'actual_trigger_metadata': alert.get('trigger_metadata', ''),
+                'event_datetime': alert.get('event_datetime', '')
+            })
+            
+            if alert_type_match:
+                print(f"🎯 PERFECT MATCH: {account_id} with {expected_alert_type}!")
+            else:
+                print(f"📍 Found {account_id} but with different alert type: {alert.get('trigger_metadata', '')}")
+
+def fetch_alerts_page(url: str, headers: dict, params: dict):
+    """Fetch one page of alert history; returns (alerts, has_next_page)."""
+    response = SESSION.get(url, headers=headers, params=params, timeout=60)
+    response.raise_for_status()
+    data = response.json()
+    
+    if "alerts" in data:
+        batch_alerts = data["alerts"]
+    elif "response" in data and isinstance(data["response"], dict) and "alerts" in data["response"]:
+        batch_alerts = data["response"]["alerts"]
+    else:
+        return [], False
+    
+    return batch_alerts, bool(data.get("next_page"))
+
 def fetch_alerts_chunk_direct_api(start_date: datetime, end_date: datetime, 
                                  thread_id: int):
+    """Fetch one date range page by page, matching each page as it arrives.
+
+    After a full first page, the next PAGE_PREFETCH pages are requested together
+    and matched in offset order. Only matches are kept, so memory is bounded by
+    one batch of pages. Returns (alerts searched, matches by account ID) for the
+    caller to merge, so workers share no state.
+    """
+    found_accounts = {}
     try:
         api_key = _env_or_fail("GEOEDGE_API_KEY")
         base_url = _env_or_fail("GEOEDGE_API_BASE").rstrip("/")
@@ -39,96 +139,56 @@ def fetch_alerts_chunk_direct_api(start_date: datetime, end_date: datetime,
         end_str = end_date.strftime("%Y-%m-%d 23:59:59")
         
         url = f"{base_url}/alerts/history"
-        headers = {
-            "Authorization": api_key,
-            "Content-Type": "application/json"
-        }
+        headers = {"Authorization": api_key}
         
-        alerts = []
-        offset = 0
+        alert_count = 0
         limit = 5000
+        base_params = {
+            "min_datetime": start_str,
+            "max_datetime": end_str,
+            "limit": limit,
+            "full_raw": 1
+        }
         
-        while True:
-            params = {
-                "min_datetime": start_str,
-                "max_datetime": end_str,
-                "offset": offset,
-                "limit": limit,
-                "full_raw": 1
-            }
-            
-            session = requests.Session()
-            response = session.get(url, headers=headers, params=params, timeout=60)
-            response.raise_for_status()
-            data = response.json()
-            
-            if "alerts" in data:
-                batch_alerts = data["alerts"]
-            elif "response" in data and isinstance(data["response"], dict) and "alerts" in data["response"]:
-                batch_alerts = data["response"]["alerts"]
-            else:
-                break
-            
-            if not batch_alerts:
-                break
-            
-            alerts.extend(batch_alerts)
-            
-            if "next_page" not in data or not data["next_page"]:
-                break
-                
-            offset += len(batch_alerts)
-            if len(batch_alerts) < limit:
-                break
-        
-        print(f"Thread {thread_id}: Retrieved {len(alerts)} alerts ({start_date.date()} to {end_date.date()})")
+        # The first page alone tells whether there is anything more to prefetch
+        batch_alerts, has_next = fetch_alerts_page(url, headers, {**base_params, "offset": 0})
+        match_alerts(batch_alerts, thread_id, found_accounts)
+        alert_count += len(batch_alerts)
+        offset = len(batch_alerts)
+        more = has_next and len(batch_alerts) == limit
         
-        # Search for target accounts and alert types in this batch
-        for alert in alerts:
-            alert_json = json.dumps(alert, indent=2).lower()
-            alert_name = alert.get('alert_name', '').lower()
-            trigger_metadata = alert.get('trigger_metadata', '').lower()
-            
-            for account_id, expected_alert_type in ACCOUNT_ALERTS.items():
-                # Check if account ID appears anywhere
-                if account_id in alert_json:
-                    # Also check if the expected alert type appears
-                    alert_type_match = False
-                    if expected_alert_type == "deceptive site":
-                        alert_type_match = "deceptive" in alert_name or "deceptive" in trigger_metadata
-                    elif expected_alert_type == "malicious domain":
-                        alert_type_match = "malicious domain" in trigger_metadata
-                    elif expected_alert_type == "financial scam":
-                        alert_type_match = "financial" in trigger_metadata
-                    elif expected_alert_type == "malicious cloaking":
-                        alert_type_match = "cloaking" in trigger_metadata
+        with ThreadPoolExecutor(max_workers=PAGE_PREFETCH) as page_pool:
+            while more:
+                futures = [
+                    page_pool.submit(fetch_alerts_page, url, headers, {**base_params, "offset": offset + i * limit})
+                    for i in range(PAGE_PREFETCH)
+                ]
+                for future in futures:
+                    batch_alerts, has_next = future.result()
+                    if not batch_alerts:
+                        more = False
+                        break
                     
-                    with alerts_lock:
-                        if account_id not in found_accounts:
-                            found_accounts[account_id] = []
-                        found_accounts[account_id].append({
-                            'thread': thread_id,
-                            'alert': alert,
-                            'expected_type': expected_alert_type,
-                            'alert_type_match': alert_type_match,
-                            'actual_alert_name': alert.get('alert_name', ''),
-                            'actual_trigger_metadata': alert.get('trigger_metadata', ''),
-                            'event_datetime': alert.get('event_datetime', '')
-                        })
-                        
-                        if alert_type_match:
-                            print(f"🎯 PERFECT MATCH: {account_id} with {expected_alert_type}!")
-                        else:
-                            print(f"📍 Found {account_id} but with different alert type: {alert.get('trigger_metadata', '')}")
+                    # Match this page now and let it go before looking at the next one
+                    match_alerts(batch_alerts, thread_id, found_accounts)
+                    alert_count += len(batch_alerts)
+                    offset += len(batch_alerts)
+                    
+                    if not has_next or len(batch_alerts) < limit:
+                        more = False
+                        break
+                
+                # Pages requested past the end are simply dropped
+                for future in futures:
+                    future.cancel()
         
-        with alerts_lock:
-            all_alerts.extend(alerts)
+        print(f"Thread {thread_id}: Searched {alert_count} alerts ({start_date.date()} to {end_date.date()})")
         
-        return alerts
+        return alert_count, found_accounts
         
     except Exception as e:
         print(f"Thread {thread_id}: Error: {e}")
-        return []
+        return 0, {}
 
 def search_extended_timeframe():
     """Search for accounts in extended timeframe."""
@@ -158,19 +218,26 @@ def search_extended_timeframe():
     print(f"Using {len(date_ranges)} time chunks")
     
     # Fetch alerts
-    with ThreadPoolExecutor(max_workers=4) as executor:
+    with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as executor:
         futures = [
             executor.submit(fetch_alerts_chunk_direct_api, start, end, tid)
             for start, end, tid in date_ranges
         ]
         
+        # Merge each worker's results in this thread as it finishes
+        alerts_searched = 0
+        found_accounts = {}
         for future in as_completed(futures):
             try:
-                future.result()
+                alert_count, chunk_found = future.result()
             except Exception as e:
                 print(f"Thread failed: {e}")
+                continue
+            alerts_searched += alert_count
+            for account_id, findings in chunk_found.items():
+                found_accounts.setdefault(account_id, []).extend(findings)
     
-    print(f"Total alerts searched: {len(all_alerts):,}")
+    print(f"Total alerts searched: {alerts_searched:,}")
     
     # Report comprehensive findings
     print(f"\n=== COMPREHENSIVE RESULTS ===")
@@ -223,6 +290,8 @@ def search_extended_timeframe():
         missing = set(ACCOUNT_ALERTS.keys()) - set(found_accounts.keys())
         print(f"Missing accounts: {sorted(missing)}")
         print("These accounts have NO alerts in the 180-day period")
+    
+    return found_accounts
 
 if __name__ == "__main__":
     search_extended_timeframe()
\ No newline at end of file
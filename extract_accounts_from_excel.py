@@ -17,6 +17,11 @@ import pandas as pd
 import pymysql
 from dotenv import load_dotenv
 
+# Campaign IDs per IN (...) lookup; keeps each statement small for the MySQL parser/planner
+CAMPAIGN_LOOKUP_CHUNK_SIZE = 1000
+# Above this many IDs, load them into a temporary table and resolve them with a single JOIN
+CAMPAIGN_TEMP_TABLE_THRESHOLD = 10000
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Extract account IDs from dashboard workbook")
@@ -43,26 +48,23 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def load_campaigns(path: Path, sheet: str) -> List[int]:
-    df = pd.read_excel(path, sheet_name=sheet)
+def load_campaigns(workbook: pd.ExcelFile, sheet: str) -> List[int]:
+    df = pd.read_excel(workbook, sheet_name=sheet, usecols=lambda column: column == "campaign_id")
     if "campaign_id" not in df.columns:
         raise RuntimeError(f"Sheet '{sheet}' does not have a campaign_id column")
-    ids = [int(cid) for cid in df["campaign_id"].dropna().astype(int).tolist()]
-    return ids
+    return df["campaign_id"].dropna().astype("int64").tolist()
 
 
-def load_excluded_accounts(path: Path, sheet: str) -> Set[str]:
+def load_excluded_accounts(workbook: pd.ExcelFile, sheet: str) -> Set[str]:
     try:
-        df = pd.read_excel(path, sheet_name=sheet)
+        df = pd.read_excel(workbook, sheet_name=sheet, usecols=lambda column: column == "account_id")
     except ValueError:
         return set()
     if "account_id" not in df.columns:
         return set()
-    return {
-        str(int(value))
-        for value in df["account_id"].dropna().tolist()
-        if str(value).strip()
-    }
+    # One numeric pass: blanks and other non-numeric cells become NaN and are dropped
+    accounts = pd.to_numeric(df["account_id"], errors="coerce").dropna()
+    return set(accounts.astype("int64").astype(str))
 
 
 def fetch_campaign_accounts(campaign_ids: Sequence[int]) -> Dict[int, str]:
@@ -79,8 +81,7 @@ def fetch_campaign_accounts(campaign_ids: Sequence[int]) -> Dict[int, str]:
     if not all([host, user, password, database]):
         raise RuntimeError("Missing MySQL credentials in environment/.env")
 
-    placeholders = ", ".join(["%s"] * len(campaign_ids))
-    sql = f"SELECT id, syndicator_id FROM trc.sp_campaigns WHERE id IN ({placeholders})"
+    unique_ids = list(dict.fromkeys(campaign_ids))
 
     connection = pymysql.connect(
         host=host,
@@ -88,12 +89,35 @@ def fetch_campaign_accounts(campaign_ids: Sequence[int]) -> Dict[int, str]:
         user=user,
         password=password,
         database=database,
-        cursorclass=pymysql.cursors.Cursor,
+        cursorclass=pymysql.cursors.SSCursor,
     )
+    mapping: Dict[int, str] = {}
     try:
         with connection.cursor() as cursor:
-            cursor.execute(sql, tuple(campaign_ids))
-            return {int(row[0]): str(int(row[1])) for row in cursor.fetchall() if row[1] is not None}
+            if len(unique_ids) > CAMPAIGN_TEMP_TABLE_THRESHOLD:
+                cursor.execute("CREATE TEMPORARY TABLE tmp_campaign_ids (id BIGINT PRIMARY KEY)")
+                cursor.executemany("INSERT INTO tmp_campaign_ids (id) VALUES (%s)", [(cid,) for cid in unique_ids])
+                cursor.execute(
+                    "SELECT c.id, c.syndicator_id FROM trc.sp_campaigns c "
+                    "JOIN tmp_campaign_ids t ON t.id = c.id WHERE c.syndicator_id IS NOT NULL"
+                )
+                for row in cursor:
+                    mapping[int(row[0])] = str(int(row[1]))
+                cursor.execute("DROP TEMPORARY TABLE tmp_campaign_ids")
+                return mapping
+
+            for start in range(0, len(unique_ids), CAMPAIGN_LOOKUP_CHUNK_SIZE):
+                chunk = unique_ids[start:start + CAMPAIGN_LOOKUP_CHUNK_SIZE]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"SELECT id, syndicator_id FROM trc.sp_campaigns WHERE id IN ({placeholders})",
+                    tuple(chunk),
+                )
+                # Unbuffered cursor: rows stream in as the mapping is built
+                for row in cursor:
+                    if row[1] is not None:
+                        mapping[int(row[0])] = str(int(row[1]))
+        return mapping
     finally:
         connection.close()
 
@@ -101,9 +125,11 @@ def fetch_campaign_accounts(campaign_ids: Sequence[int]) -> Dict[int, str]:
 def main() -> int:
     args = parse_args()
     workbook_path = Path(args.workbook).expanduser().resolve()
-    campaigns = load_campaigns(workbook_path, args.final_sheet)
+    # Open the workbook once; both sheet reads share its parsed structure and only load one column
+    with pd.ExcelFile(workbook_path, engine="openpyxl") as workbook:
+        campaigns = load_campaigns(workbook, args.final_sheet)
+        excluded = load_excluded_accounts(workbook, args.exclude_sheet)
     mapping = fetch_campaign_accounts(campaigns)
-    excluded = load_excluded_accounts(workbook_path, args.exclude_sheet)
 
     accounts: Set[str] = set()
     missing_campaigns: List[int] = []
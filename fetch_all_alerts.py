@@ -5,14 +5,81 @@
 from __future__ import annotations
 
 import argparse
+import io
+import math
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple, cast
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, cast
+from xml.sax.saxutils import escape
 
 import pandas as pd
 from dotenv import load_dotenv
-
-from geoedge_projects.client import GeoEdgeClient
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from geoedge_projects.client import GeoEdgeClient, HeaderRateLimiter
+
+# Use orjson for the security URL lists when it is installed (C encoder); same compact output either way
+try:
+    import orjson
+
+    def json_text(value: Any) -> str:
+        return orjson.dumps(value).decode()
+except ImportError:
+    import json
+
+    def json_text(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+# First underscore-separated token of 7+ digits in a project name is taken as its campaign ID
+CAMPAIGN_ID_PATTERN = re.compile(r"(?:^|_)\s*(\d{7,})\s*(?=_|$)")
+
+# Field order of the tuples returned by flatten_alert
+ALERT_COLUMNS = (
+    "alert_id",
+    "event_datetime",
+    "alert_name",
+    "alert_details_url",
+    "trigger_type_id",
+    "trigger_metadata",
+    "project_id",
+    "project_name",
+    "campaign_id_guess",
+    "location_code",
+    "location_name",
+    "tag_id",
+    "tag_name",
+    "tag_url",
+    "landing_page_url",
+    "screenshot_url",
+    "security_url_count",
+    "security_urls_sample",
+    "has_security_urls",
+    "geoedge_category",
+    "severity",
+    "malicious_type",
+    "security_urls_all",
+)
+
+# Date chunks downloaded at once; pages inside a chunk follow next_page links, so they stay sequential
+FETCH_WORKERS = 8
+
+# Alerts per task when flattening in worker processes; smaller runs are flattened inline
+FLATTEN_CHUNK_SIZE = 2000
+
+SHEET_XML_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_XML_FOOTER = "</sheetData></worksheet>"
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -47,105 +114,151 @@ def chunk_range(start: datetime, end: datetime, delta_days: int) -> Iterable[Tup
         cursor = next_cursor
 
 
+def first_mapping_item(value: Any, _next=next, _iter=iter) -> Tuple[Optional[str], Optional[str]]:
+    # {id: name} maps are the common case, so try .items() directly instead of isinstance checks
+    if not value:
+        return None, None
+    try:
+        key, item = _next(_iter(value.items()))
+    except AttributeError:
+        return None, None
+    return str(key), str(item)
+
+
 def extract_project(alert: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
-    project_map_raw = alert.get("project_name")
-    project_map: Dict[str, Any] = cast(Dict[str, Any], project_map_raw) if isinstance(project_map_raw, dict) else {}
-    if project_map:
-        project_id, project_name = next(iter(project_map.items()))
-        return str(project_id), str(project_name)
-    return None, None
+    return first_mapping_item(alert.get("project_name"))
 
 
 def extract_location(alert: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
-    location_map_raw = alert.get("location")
-    location_map: Dict[str, Any] = cast(Dict[str, Any], location_map_raw) if isinstance(location_map_raw, dict) else {}
-    if location_map:
-        location_code, location_name = next(iter(location_map.items()))
-        return str(location_code), str(location_name)
-    return None, None
+    return first_mapping_item(alert.get("location"))
 
 
+@lru_cache(maxsize=65536)
 def guess_campaign_id(project_name: Optional[str]) -> Optional[str]:
+    # Project names repeat across alerts, so each distinct name is only scanned once
     if not project_name:
         return None
-    parts = project_name.split("_")
-    for part in parts:
-        stripped = part.strip()
-        if stripped.isdigit() and len(stripped) >= 7:
-            return stripped
-    return None
-
-
-def flatten_alert(alert: Dict[str, Any]) -> Dict[str, Any]:
-    project_id, project_name = extract_project(alert)
-    location_code, location_name = extract_location(alert)
-    security_urls_raw = alert.get("security_incident_urls")
+    match = CAMPAIGN_ID_PATTERN.search(project_name)
+    return match.group(1) if match else None
+
+
+def flatten_alert(alert: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Flatten one alert into a row ordered like ALERT_COLUMNS."""
+    get = alert.get  # bound once; every field below goes through it
+    project_id, project_name = first_mapping_item(get("project_name"))
+    location_code, location_name = first_mapping_item(get("location"))
+    security_urls_raw = get("security_incident_urls")
     security_urls: List[str]
     if isinstance(security_urls_raw, list):
         security_urls = [str(url) for url in security_urls_raw]
     else:
         security_urls = []
 
-    tag_raw = alert.get("tag")
+    tag_raw = get("tag")
     tag_block: Dict[str, Any] = cast(Dict[str, Any], tag_raw) if isinstance(tag_raw, dict) else {}
 
-    flattened = {
-        "alert_id": alert.get("alert_id"),
-        "event_datetime": alert.get("event_datetime"),
-        "alert_name": alert.get("alert_name"),
-        "alert_details_url": alert.get("alert_details_url"),
-        "trigger_type_id": alert.get("trigger_type_id"),
-        "trigger_metadata": alert.get("trigger_metadata"),
-        "project_id": project_id,
-        "project_name": project_name,
-        "campaign_id_guess": guess_campaign_id(project_name),
-        "location_code": location_code,
-        "location_name": location_name,
-        "tag_id": alert.get("tag_id") or tag_block.get("id"),
-        "tag_name": tag_block.get("name"),
-        "tag_url": alert.get("tag_url") or tag_block.get("url"),
-        "landing_page_url": alert.get("landing_page_url") or alert.get("landing_url"),
-        "screenshot_url": alert.get("screenshot_url"),
-        "security_url_count": len(security_urls),
-        "security_urls_sample": "; ".join(security_urls[:3]),
-        "has_security_urls": bool(security_urls),
-        "geoedge_category": alert.get("geode_category") or alert.get("category"),
-        "severity": alert.get("severity"),
-        "malicious_type": alert.get("malicious_type"),
-    }
-
-    # Include the raw security urls as JSON list for completeness
-    flattened["security_urls_all"] = security_urls
-    return flattened
-
-
-def fetch_alerts(args: argparse.Namespace) -> List[Dict[str, Any]]:
-    client = GeoEdgeClient()
+    return (
+        get("alert_id"),
+        get("event_datetime"),
+        get("alert_name"),
+        get("alert_details_url"),
+        get("trigger_type_id"),
+        get("trigger_metadata"),
+        project_id,
+        project_name,
+        guess_campaign_id(project_name),
+        location_code,
+        location_name,
+        get("tag_id") or tag_block.get("id"),
+        tag_block.get("name"),
+        get("tag_url") or tag_block.get("url"),
+        get("landing_page_url") or get("landing_url"),
+        get("screenshot_url"),
+        len(security_urls),
+        "; ".join(security_urls[:3]),
+        bool(security_urls),
+        get("geode_category") or get("category"),
+        get("severity"),
+        get("malicious_type"),
+        # Include the raw security urls as JSON list for completeness
+        json_text(security_urls),
+    )
+
+
+def fetch_chunk(client: GeoEdgeClient, chunk_start: datetime, chunk_end: datetime, max_pages: int) -> List[Dict[str, Any]]:
+    alerts: List[Dict[str, Any]] = []
+    # Whole pages are added at once rather than one alert at a time
+    for page in client.iter_alert_pages(
+        min_datetime=chunk_start.strftime("%Y-%m-%d %H:%M:%S"),
+        max_datetime=chunk_end.strftime("%Y-%m-%d %H:%M:%S"),
+        full_raw=1,
+        page_limit=5000,
+        max_pages=max_pages,
+    ):
+        alerts.extend(page)
+    return alerts
+
+
+def fetch_alerts(args: argparse.Namespace) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the alerts of each date chunk, oldest chunk first."""
+    # Every chunk worker shares one limiter, so the API's remaining budget is tracked across threads
+    client = GeoEdgeClient(rate_limiter=HeaderRateLimiter())
     now = datetime.utcnow()
     start = now - timedelta(days=args.days)
 
-    alerts: List[Dict[str, Any]] = []
-    chunk_index = 0
-    for chunk_start, chunk_end in chunk_range(start, now, args.chunk_days):
-        chunk_index += 1
+    chunks = list(chunk_range(start, now, args.chunk_days))
+    for chunk_index, (chunk_start, chunk_end) in enumerate(chunks, 1):
         print(
             f"Chunk {chunk_index}: {chunk_start:%Y-%m-%d %H:%M} -> {chunk_end:%Y-%m-%d %H:%M}"
         )
-        chunk_alerts = 0
-        for alert in client.iter_alerts_history(
-            min_datetime=chunk_start.strftime("%Y-%m-%d %H:%M:%S"),
-            max_datetime=chunk_end.strftime("%Y-%m-%d %H:%M:%S"),
-            full_raw=1,
-            page_limit=5000,
-            max_pages=args.max_pages,
-        ):
-            alerts.append(alert)
-            chunk_alerts += 1
-        print(
-            f"  ↳ Retrieved {chunk_alerts} alerts for {chunk_start:%Y-%m-%d} to {chunk_end:%Y-%m-%d}"
-        )
-    return alerts
 
+    # Chunks download concurrently over the client's pooled session (429/5xx retries honour
+    # Retry-After). At most FETCH_WORKERS chunks are in flight or waiting to be consumed,
+    # so memory stays bounded while the caller writes earlier chunks.
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        pending: deque = deque()
+        chunk_iter = iter(chunks)
+        for chunk_start, chunk_end in chunk_iter:
+            pending.append((chunk_start, chunk_end, executor.submit(fetch_chunk, client, chunk_start, chunk_end, args.max_pages)))
+            if len(pending) >= FETCH_WORKERS:
+                break
+        while pending:
+            chunk_start, chunk_end, future = pending.popleft()
+            chunk_alerts = future.result()
+            next_chunk = next(chunk_iter, None)
+            if next_chunk is not None:
+                pending.append((*next_chunk, executor.submit(fetch_chunk, client, *next_chunk, args.max_pages)))
+            print(
+                f"  ↳ Retrieved {len(chunk_alerts)} alerts for {chunk_start:%Y-%m-%d} to {chunk_end:%Y-%m-%d}"
+            )
+            yield chunk_alerts
+
+
+def flatten_chunks(
+    alert_chunks: Iterable[List[Dict[str, Any]]], executor: ProcessPoolExecutor
+) -> Iterator[Tuple[Any, ...]]:
+    """Flatten and time-sort each chunk; chunks cover consecutive date ranges, so output is sorted overall.
+
+    Alerts whose event_datetime is missing or unparseable are held back and
+    written after every dated alert, so they end up together at the end of the sheet.
+    """
+    undated: List[Tuple[Any, ...]] = []
+    for chunk in alert_chunks:
+        if len(chunk) > FLATTEN_CHUNK_SIZE:
+            rows = list(executor.map(flatten_alert, chunk, chunksize=FLATTEN_CHUNK_SIZE))
+        else:
+            rows = [flatten_alert(alert) for alert in chunk]
+        if not rows:
+            continue
+        # Sort on parsed timestamps (whatever format the API used); the rows keep the API's strings
+        timestamps = pd.to_datetime(
+            pd.Series([row[1] for row in rows], dtype=object), errors="coerce", format="mixed", utc=True
+        )
+        dated = timestamps.notna().to_numpy()
+        undated.extend(row for row, has_time in zip(rows, dated) if not has_time)
+        order = timestamps[dated].sort_values(kind="stable").index
+        yield from (rows[i] for i in order)
+    yield from undated
 
 def build_output_path(user_path: Optional[str]) -> Path:
     if user_path:
@@ -154,41 +267,124 @@ def build_output_path(user_path: Optional[str]) -> Path:
     return Path(f"geoedge_alerts_{timestamp}.xlsx").resolve()
 
 
-def export_to_excel(alert_rows: List[Dict[str, Any]], output_path: Path) -> None:
-    df = pd.DataFrame(alert_rows)
-    if df.empty:
-        raise RuntimeError("No alerts to export")
-
-    df.sort_values("event_datetime", inplace=True)
-
-    summary_alerts = (
-        df.groupby("alert_name")
-        .size()
-        .reset_index(name="alert_count")
-        .sort_values("alert_count", ascending=False)
-    )
-
-    summary_trigger = (
-        df.groupby("trigger_metadata")
-        .size()
-        .reset_index(name="alert_count")
-        .sort_values("alert_count", ascending=False)
-    )
-
-    summary_projects = (
-        df.groupby(["project_id", "project_name"])
-        .size()
-        .reset_index(name="alert_count")
-        .sort_values("alert_count", ascending=False)
+def excel_rows(df: pd.DataFrame) -> Iterator[Tuple[Any, ...]]:
+    """Yield DataFrame rows as plain tuples openpyxl can write (missing -> blank, lists -> str)."""
+    rows = df.copy()
+    for column in df.columns[df.dtypes == object]:
+        rows[column] = df[column].map(
+            lambda value: value if value is None or isinstance(value, (str, int, float, bool)) else str(value)
+        )
+    # Blank out missing values last; map() can re-infer a string dtype that turns None back into NaN
+    rows = rows.astype(object)
+    return rows.where(rows.notna(), None).itertuples(index=False, name=None)
+
+
+def write_sheet(workbook: Workbook, title: str, df: pd.DataFrame) -> None:
+    sheet = workbook.create_sheet(title=title)
+    sheet.append(list(df.columns))
+    for row in excel_rows(df):
+        sheet.append(row)
+
+
+def cell_xml(value: Any) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, float) and not math.isfinite(value):
+        return "<c/>"  # Excel has no NaN/inf value; "nan" in <v> makes the file corrupt
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value!r}</v></c>"
+    text = escape(ILLEGAL_CHARACTERS_RE.sub("", value if isinstance(value, str) else str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def write_sheet_xml(out: io.TextIOBase, columns: Sequence[str], rows: Iterable[Tuple[Any, ...]]) -> int:
+    """Serialize a header plus rows as worksheet XML, one string per row; returns the row count.
+
+    Values are written as inline strings/numbers, so the biggest sheet skips
+    openpyxl's per-cell objects and the shared-strings table.
+    """
+    out.write(SHEET_XML_HEADER)
+    out.write("<row>" + "".join(cell_xml(column) for column in columns) + "</row>")
+    count = 0
+    for row in rows:
+        out.write("<row>" + "".join(map(cell_xml, row)) + "</row>")
+        count += 1
+    out.write(SHEET_XML_FOOTER)
+    return count
+
+
+def replace_sheet_part(path: Path, sheet_part: str, sheet_xml: io.BufferedIOBase) -> None:
+    """Swap one worksheet part of a saved workbook for pre-rendered XML."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with zipfile.ZipFile(path) as source, zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            if item.filename != sheet_part:
+                target.writestr(item, source.read(item.filename))
+        # The streamed sheet's size is unknown up front; force_zip64 lets it grow past 2 GiB
+        with target.open(sheet_part, "w", force_zip64=True) as raw:
+            shutil.copyfileobj(sheet_xml, raw, 1 << 20)
+    os.replace(tmp_path, path)
+
+
+def count_frame(counter: Counter, columns: List[str]) -> pd.DataFrame:
+    """Small summary frame from a Counter, most frequent first."""
+    return pd.DataFrame(
+        [(*key, count) if isinstance(key, tuple) else (key, count) for key, count in counter.most_common()],
+        columns=columns + ["alert_count"],
     )
 
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name="Alerts", index=False)
-        summary_alerts.to_excel(writer, sheet_name="By Alert Name", index=False)
-        summary_trigger.to_excel(writer, sheet_name="By Trigger Metadata", index=False)
-        summary_projects.to_excel(writer, sheet_name="By Project", index=False)
 
-    print(f"Saved {len(df)} alerts to {output_path}")
+def export_to_excel(alert_rows: Iterable[Tuple[Any, ...]], output_path: Path) -> int:
+    """Stream flattened alert rows into the workbook; returns the number of alerts written.
+
+    The Alerts sheet is rendered to a temporary XML file as rows arrive while the
+    three summaries are tallied in Counters, so memory does not grow with the
+    number of alerts. Nothing is written when there are no rows.
+    """
+    name_index = ALERT_COLUMNS.index("alert_name")
+    trigger_index = ALERT_COLUMNS.index("trigger_metadata")
+    project_id_index = ALERT_COLUMNS.index("project_id")
+    project_name_index = ALERT_COLUMNS.index("project_name")
+    by_alert_name: Counter = Counter()
+    by_trigger: Counter = Counter()
+    by_project: Counter = Counter()
+
+    def tallied(rows: Iterable[Tuple[Any, ...]]) -> Iterator[Tuple[Any, ...]]:
+        for row in rows:
+            # Missing keys are left out of the summaries
+            if row[name_index] is not None:
+                by_alert_name[row[name_index]] += 1
+            if row[trigger_index] is not None:
+                by_trigger[row[trigger_index]] += 1
+            if row[project_id_index] is not None and row[project_name_index] is not None:
+                by_project[row[project_id_index], row[project_name_index]] += 1
+            yield row
+
+    with tempfile.TemporaryFile() as sheet_xml:
+        out = io.TextIOWrapper(sheet_xml, encoding="utf-8")
+        count = write_sheet_xml(out, ALERT_COLUMNS, tallied(alert_rows))
+        out.flush()
+        out.detach()
+        if not count:
+            print("No alerts to export")
+            return 0
+
+        # Write-only workbook streams rows straight to the file instead of building a Cell per value.
+        # The Alerts sheet is saved empty and then swapped for the XML rendered above.
+        workbook = Workbook(write_only=True)
+        workbook.create_sheet(title="Alerts")
+        write_sheet(workbook, "By Alert Name", count_frame(by_alert_name, ["alert_name"]))
+        write_sheet(workbook, "By Trigger Metadata", count_frame(by_trigger, ["trigger_metadata"]))
+        write_sheet(workbook, "By Project", count_frame(by_project, ["project_id", "project_name"]))
+        workbook.save(output_path)
+
+        sheet_xml.seek(0)
+        replace_sheet_part(output_path, "xl/worksheets/sheet1.xml", sheet_xml)
+
+    print(f"Saved {count} alerts to {output_path}")
+    return count
 
 
 def main() -> int:
@@ -200,14 +396,12 @@ def main() -> int:
         f"Fetching GeoEdge alerts for last {args.days} days in {args.chunk_days}-day chunks (max_pages={args.max_pages})"
     )
 
-    raw_alerts = fetch_alerts(args)
-    print(f"Total alerts fetched: {len(raw_alerts)}")
-    if not raw_alerts:
-        return 0
-
-    flattened = [flatten_alert(alert) for alert in raw_alerts]
+    # Alerts flow chunk by chunk from the API through flattening into the workbook;
+    # no stage holds the full download
     output_path = build_output_path(args.output)
-    export_to_excel(flattened, output_path)
+    with ProcessPoolExecutor() as executor:
+        total = export_to_excel(flatten_chunks(fetch_alerts(args), executor), output_path)
+    print(f"Total alerts fetched: {total}")
     return 0
 
 
@@ -4,6 +4,8 @@ Final Double-Check with Correct Database Schema
 Check actual campaign activity and spending to verify account status
 """
 
+import argparse
+import json
 import logging
 import pymysql
 from datetime import datetime, timedelta
@@ -34,10 +36,76 @@ TARGET_ACCOUNTS = [
     "1162263", "1346833", "1243926", "1907682", "1535686", "1867619"
 ]
 
+# Rows pulled per round trip from the unbuffered cursor
+FETCH_BATCH_SIZE = 10_000
+
+def iter_rows(cursor, batch_size: int = FETCH_BATCH_SIZE):
+    """Yield rows from an executed cursor in fetchmany batches"""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
+# sp_campaigns' account column rarely changes, so it is probed once and remembered across runs
+ACCOUNT_COLUMN_CACHE_FILE = 'sp_campaigns_account_column.json'
+_ACCOUNT_COLUMN_CACHE = None
+
+def _resolve_account_column(cursor, verbose: bool = False, refresh: bool = False):
+    """Return the sp_campaigns account column, probing the schema only on a cache miss"""
+    global _ACCOUNT_COLUMN_CACHE
+    if not refresh:
+        if _ACCOUNT_COLUMN_CACHE:
+            return _ACCOUNT_COLUMN_CACHE
+        try:
+            with open(ACCOUNT_COLUMN_CACHE_FILE) as f:
+                _ACCOUNT_COLUMN_CACHE = json.load(f).get('account_column')
+        except (OSError, ValueError):
+            _ACCOUNT_COLUMN_CACHE = None
+        if _ACCOUNT_COLUMN_CACHE:
+            return _ACCOUNT_COLUMN_CACHE
+    
+    if verbose:
+        # First, let's check what tables exist and their columns
+        cursor.execute("SHOW TABLES LIKE '%campaign%'")
+        campaign_tables = cursor.fetchall()
+        
+        print("📋 AVAILABLE CAMPAIGN TABLES:")
+        for table in campaign_tables:
+            table_name = list(table.values())[0]
+            print(f"   • {table_name}")
+    
+    # Check sp_campaigns table structure
+    cursor.execute("DESCRIBE sp_campaigns")
+    columns = cursor.fetchall()
+    
+    if verbose:
+        print(f"\n📊 SP_CAMPAIGNS TABLE COLUMNS:")
+        for col in columns[:10]:  # Show first 10 columns
+            print(f"   • {col['Field']}: {col['Type']}")
+    
+    # Find the correct column name for account ID in sp_campaigns
+    account_column = None
+    for col in columns:
+        if 'account' in col['Field'].lower() or 'publisher' in col['Field'].lower():
+            account_column = col['Field']
+            print(f"   🎯 Found account column: {account_column}")
+            break
+    
+    _ACCOUNT_COLUMN_CACHE = account_column
+    if account_column:
+        try:
+            with open(ACCOUNT_COLUMN_CACHE_FILE, 'w') as f:
+                json.dump({'account_column': account_column}, f)
+        except OSError as e:
+            logger.warning(f"Could not save account column cache: {e}")
+    return account_column
+
 class FinalDoubleCheck:
     """Final comprehensive double-check with correct database queries"""
     
-    def __init__(self):
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
         self.db_config = {
             'host': os.getenv('MYSQL_HOST', 'proxysql-office.taboolasyndication.com'),
             'port': int(os.getenv('MYSQL_PORT', 6033)),
@@ -51,78 +119,86 @@ class FinalDoubleCheck:
         """Create database connection"""
         return pymysql.connect(**self.db_config)
     
+    def _execute_activity_query(self, cursor, account_column, account_ids):
+        """Run the per-account campaign activity query; rows are read by the caller"""
+        # One LEFT JOIN pass: campaign counts per target account plus its publisher status;
+        # accounts with zero campaigns fall out of the same result set
+        cursor.execute(f"""
+            SELECT 
+                p.id as account_id,
+                p.name,
+                p.status,
+                p.inactivity_date,
+                COUNT(sc.{account_column}) as total_campaigns,
+                COUNT(CASE WHEN sc.status = 'RUNNING' THEN 1 END) as running_campaigns,
+                COUNT(CASE WHEN sc.status = 'PAUSED' THEN 1 END) as paused_campaigns,
+                MAX(sc.update_time) as last_campaign_update,
+                MIN(sc.create_time) as first_campaign_created
+            FROM publishers p
+            LEFT JOIN sp_campaigns sc ON sc.{account_column} = p.id
+            WHERE p.id IN %s
+            GROUP BY p.id, p.name, p.status, p.inactivity_date
+            ORDER BY total_campaigns DESC
+        """, (account_ids,))
+    
     def check_campaign_activity(self):
         """Check actual campaign activity using correct schema"""
         db = self._get_db_connection()
-        cursor = db.cursor(pymysql.cursors.DictCursor)
+        # Unbuffered: result rows stream in batches instead of being held in memory at once
+        cursor = db.cursor(pymysql.cursors.SSDictCursor)
         
         try:
             print("🏃 CHECKING CAMPAIGN ACTIVITY (CORRECTED QUERIES):")
             print("=" * 60)
             
             account_ids = [int(acc_id) for acc_id in TARGET_ACCOUNTS]
-            placeholders = ','.join(['%s'] * len(account_ids))
-            
-            # First, let's check what tables exist and their columns
-            cursor.execute("SHOW TABLES LIKE '%campaign%'")
-            campaign_tables = cursor.fetchall()
             
-            print("📋 AVAILABLE CAMPAIGN TABLES:")
-            for table in campaign_tables:
-                table_name = list(table.values())[0]
-                print(f"   • {table_name}")
-            
-            # Check sp_campaigns table structure
-            cursor.execute("DESCRIBE sp_campaigns")
-            columns = cursor.fetchall()
-            
-            print(f"\n📊 SP_CAMPAIGNS TABLE COLUMNS:")
-            for col in columns[:10]:  # Show first 10 columns
-                print(f"   • {col['Field']}: {col['Type']}")
-            
-            # Find the correct column name for account ID in sp_campaigns
-            account_column = None
-            for col in columns:
-                if 'account' in col['Field'].lower() or 'publisher' in col['Field'].lower():
-                    account_column = col['Field']
-                    print(f"   🎯 Found account column: {account_column}")
-                    break
+            account_column = _resolve_account_column(cursor, self.verbose)
             
             if account_column:
-                # Check campaign activity with correct column
-                cursor.execute(f"""
-                    SELECT 
-                        sc.{account_column} as account_id,
-                        COUNT(*) as total_campaigns,
-                        COUNT(CASE WHEN sc.status = 'RUNNING' THEN 1 END) as running_campaigns,
-                        COUNT(CASE WHEN sc.status = 'PAUSED' THEN 1 END) as paused_campaigns,
-                        MAX(sc.update_time) as last_campaign_update,
-                        MIN(sc.create_time) as first_campaign_created
-                    FROM sp_campaigns sc
-                    WHERE sc.{account_column} IN ({placeholders})
-                    GROUP BY sc.{account_column}
-                    ORDER BY total_campaigns DESC
-                """, account_ids)
-                
-                campaign_results = cursor.fetchall()
-                
-                print(f"\n📈 CAMPAIGN ACTIVITY FOR TARGET ACCOUNTS:")
-                print(f"   Found campaign data for {len(campaign_results)} accounts")
+                try:
+                    self._execute_activity_query(cursor, account_column, account_ids)
+                except pymysql.err.OperationalError as e:
+                    # A stale cached column fails here; re-probe the schema and retry once
+                    logger.warning(f"Campaign query failed with cached column {account_column}: {e}")
+                    account_column = _resolve_account_column(cursor, self.verbose, refresh=True)
+                    if not account_column:
+                        return
+                    self._execute_activity_query(cursor, account_column, account_ids)
                 
                 accounts_with_campaigns = []
+                top_campaign_results = []
                 accounts_without_campaigns = []
+                inactive_no_campaigns = []
+                live_no_campaigns = []
+                seen_accounts = set()
+                
+                for result in iter_rows(cursor):
+                    account_id = str(result['account_id'])
+                    seen_accounts.add(account_id)
+                    if result['total_campaigns']:
+                        accounts_with_campaigns.append(account_id)
+                        if len(top_campaign_results) < 10:
+                            top_campaign_results.append(result)
+                        continue
+                    accounts_without_campaigns.append(account_id)
+                    if result['status'] == 'INACTIVE':
+                        inactive_no_campaigns.append(result)
+                    else:
+                        live_no_campaigns.append(result)
                 
-                for result in campaign_results:
-                    accounts_with_campaigns.append(str(result['account_id']))
+                # Target IDs missing from publishers have no campaigns either
+                accounts_without_campaigns.extend(acc for acc in TARGET_ACCOUNTS if acc not in seen_accounts)
                 
-                accounts_without_campaigns = [acc for acc in TARGET_ACCOUNTS if acc not in accounts_with_campaigns]
+                print(f"\n📈 CAMPAIGN ACTIVITY FOR TARGET ACCOUNTS:")
+                print(f"   Found campaign data for {len(accounts_with_campaigns)} accounts")
                 
                 print(f"   • Accounts WITH campaigns: {len(accounts_with_campaigns)}")
                 print(f"   • Accounts WITHOUT campaigns: {len(accounts_without_campaigns)}")
                 
-                if campaign_results:
+                if top_campaign_results:
                     print(f"\n📊 TOP ACTIVE ACCOUNTS BY CAMPAIGN COUNT:")
-                    for i, result in enumerate(campaign_results[:10]):
+                    for i, result in enumerate(top_campaign_results):
                         last_update = result['last_campaign_update'].strftime('%Y-%m-%d') if result['last_campaign_update'] else 'Never'
                         print(f"   {i+1}. Account {result['account_id']}: {result['total_campaigns']} campaigns ({result['running_campaigns']} running), last: {last_update}")
                 
@@ -131,25 +207,7 @@ class FinalDoubleCheck:
                     for acc in accounts_without_campaigns[:10]:
                         print(f"   • Account {acc}: No campaigns found")
                 
-                # Check if accounts without campaigns are the inactive ones
-                cursor.execute(f"""
-                    SELECT id, name, status, inactivity_date
-                    FROM publishers 
-                    WHERE id IN ({','.join(['%s'] * len(accounts_without_campaigns))})
-                """, [int(acc) for acc in accounts_without_campaigns])
-                
-                no_campaign_status = cursor.fetchall()
-                
                 print(f"\n🔍 STATUS OF ACCOUNTS WITHOUT CAMPAIGNS:")
-                inactive_no_campaigns = []
-                live_no_campaigns = []
-                
-                for result in no_campaign_status:
-                    if result['status'] == 'INACTIVE':
-                        inactive_no_campaigns.append(result)
-                    else:
-                        live_no_campaigns.append(result)
-                
                 print(f"   • INACTIVE accounts without campaigns: {len(inactive_no_campaigns)}")
                 print(f"   • LIVE accounts without campaigns: {len(live_no_campaigns)}")
                 
@@ -157,12 +215,12 @@ class FinalDoubleCheck:
                     print(f"\n   📉 INACTIVE ACCOUNTS WITHOUT CAMPAIGNS:")
                     for acc in inactive_no_campaigns:
                         inactive_date = acc['inactivity_date'].strftime('%Y-%m-%d') if acc['inactivity_date'] else 'Unknown'
-                        print(f"      {acc['id']}: {acc['name']} (inactive: {inactive_date})")
+                        print(f"      {acc['account_id']}: {acc['name']} (inactive: {inactive_date})")
                 
                 if live_no_campaigns:
                     print(f"\n   🤔 LIVE ACCOUNTS WITHOUT CAMPAIGNS:")
                     for acc in live_no_campaigns[:5]:
-                        print(f"      {acc['id']}: {acc['name']}")
+                        print(f"      {acc['account_id']}: {acc['name']}")
                         
         except Exception as e:
             logger.error(f"Error checking campaign activity: {e}")
@@ -251,12 +309,16 @@ class FinalDoubleCheck:
 
 def main():
     """Main final double-check function"""
+    parser = argparse.ArgumentParser(description="Final double-check of target account activity")
+    parser.add_argument("--verbose", action="store_true", help="Print campaign tables and sp_campaigns columns when probing the schema")
+    args = parser.parse_args()
+    
     print("🔍 FINAL COMPREHENSIVE DOUBLE-CHECK")
     print("=" * 70)
     print("Investigating campaign activity to understand the low inactive rate...")
     print()
     
-    checker = FinalDoubleCheck()
+    checker = FinalDoubleCheck(verbose=args.verbose)
     
     # Check campaign activity with correct database schema
     checker.check_campaign_activity()
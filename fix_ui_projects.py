@@ -5,7 +5,11 @@ Fix the visible UI projects that weren't updated properly
 import os
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from geoedge_projects.client import json_loads
 
 # Load environment variables
 load_dotenv()
@@ -13,6 +17,17 @@ load_dotenv()
 # Configuration
 API_KEY = os.getenv("GEOEDGE_API_KEY")
 BASE_URL = "https://api.geoedge.com/rest/analytics/v3"
+MAX_WORKERS = 16  # Projects processed concurrently
+UPDATE_SETTLE_SECONDS = 1  # Wait after an update before re-reading the project
+
+# One keep-alive session shared by all workers
+SESSION = requests.Session()
+SESSION.headers["Authorization"] = API_KEY or ""
+SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+# Every update sends the same settings, so the form body is encoded once
+UPDATE_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+UPDATE_BODY = b"auto_scan=1&times_per_day=72"
 
 # Projects from the UI that should be updated but aren't
 ui_projects_to_fix = [
@@ -26,13 +41,11 @@ ui_projects_to_fix = [
 def update_project(project_id):
     """Update single project"""
     url = f"{BASE_URL}/projects/{project_id}"
-    headers = {"Authorization": API_KEY}
-    data = {"auto_scan": 1, "times_per_day": 72}
     
     try:
-        response = requests.put(url, headers=headers, data=data, timeout=30)
+        response = SESSION.put(url, headers=UPDATE_HEADERS, data=UPDATE_BODY, timeout=30)
         response.raise_for_status()
-        result = response.json()
+        result = json_loads(response.content)
         return result.get('status', {}).get('code') == 'Success'
     except Exception as e:
         print(f"❌ Error updating {project_id}: {e}")
@@ -41,12 +54,11 @@ def update_project(project_id):
 def verify_project(project_id):
     """Verify project settings"""
     url = f"{BASE_URL}/projects/{project_id}"
-    headers = {"Authorization": API_KEY}
     
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        response = SESSION.get(url, timeout=30)
         response.raise_for_status()
-        data = response.json()
+        data = json_loads(response.content)
         
         if 'response' in data and 'project' in data['response']:
             project = data['response']['project']
@@ -58,6 +70,34 @@ def verify_project(project_id):
         print(f"❌ Error verifying {project_id}: {e}")
         return None, None
 
+def process_project(project_id):
+    """Verify, update and re-verify one project; returns (success, report lines)"""
+    lines = []
+    
+    # Check current state
+    auto_scan, times_per_day = verify_project(project_id)
+    lines.append(f"  Current: auto_scan={auto_scan}, times_per_day={times_per_day}")
+    
+    if auto_scan == 1 and times_per_day == 72:
+        lines.append(f"  ✅ Already correct - skipping")
+        return True, lines
+    
+    # Update the project
+    lines.append(f"  🔄 Updating...")
+    if not update_project(project_id):
+        lines.append(f"  ❌ FAILED to update")
+        return False, lines
+    
+    # Verify the update
+    time.sleep(UPDATE_SETTLE_SECONDS)
+    new_auto_scan, new_times_per_day = verify_project(project_id)
+    
+    if new_auto_scan == 1 and new_times_per_day == 72:
+        lines.append(f"  ✅ SUCCESS - Updated to auto_scan={new_auto_scan}, times_per_day={new_times_per_day}")
+        return True, lines
+    lines.append(f"  ⚠️  Update may not have taken effect: auto_scan={new_auto_scan}, times_per_day={new_times_per_day}")
+    return False, lines
+
 def main():
     print("🔧 FIXING UI PROJECTS THAT WEREN'T UPDATED")
     print("=" * 60)
@@ -65,37 +105,17 @@ def main():
     success_count = 0
     failed_count = 0
     
-    for i, project_id in enumerate(ui_projects_to_fix, 1):
-        print(f"[{i}/{len(ui_projects_to_fix)}] Processing {project_id}...")
-        
-        # Check current state
-        auto_scan, times_per_day = verify_project(project_id)
-        print(f"  Current: auto_scan={auto_scan}, times_per_day={times_per_day}")
-        
-        if auto_scan == 1 and times_per_day == 72:
-            print(f"  ✅ Already correct - skipping")
-            success_count += 1
-            continue
-        
-        # Update the project
-        print(f"  🔄 Updating...")
-        if update_project(project_id):
-            # Verify the update
-            time.sleep(1)
-            new_auto_scan, new_times_per_day = verify_project(project_id)
-            
-            if new_auto_scan == 1 and new_times_per_day == 72:
-                print(f"  ✅ SUCCESS - Updated to auto_scan={new_auto_scan}, times_per_day={new_times_per_day}")
+    # Projects run concurrently; each one's report is printed as a block, in list order
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = executor.map(process_project, ui_projects_to_fix)
+        for i, (project_id, (success, lines)) in enumerate(zip(ui_projects_to_fix, results), 1):
+            print(f"[{i}/{len(ui_projects_to_fix)}] Processing {project_id}...")
+            print("\n".join(lines))
+            print()
+            if success:
                 success_count += 1
             else:
-                print(f"  ⚠️  Update may not have taken effect: auto_scan={new_auto_scan}, times_per_day={new_times_per_day}")
                 failed_count += 1
-        else:
-            print(f"  ❌ FAILED to update")
-            failed_count += 1
-        
-        print()
-        time.sleep(1)  # Brief delay between updates
     
     print("=" * 60)
     print(f"🎯 RESULTS:")
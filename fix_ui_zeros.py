@@ -7,7 +7,10 @@ Update specific projects visible in UI that are showing 0/0
 import os
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Load environment variables
 load_dotenv()
@@ -15,6 +18,22 @@ load_dotenv()
 # Configuration
 API_KEY = os.getenv("GEOEDGE_API_KEY")
 BASE_URL = "https://api.geoedge.com/rest/analytics/v3"
+MAX_WORKERS = 8  # Projects checked/updated concurrently
+
+# One keep-alive session for every GET/PUT, so TLS connections are reused across projects
+SESSION = requests.Session()
+SESSION.headers.update({"Authorization": API_KEY or ""})
+# Transient 429/5xx responses are retried with backoff (honouring Retry-After) instead of failing the project
+RETRY = Retry(
+    total=5,
+    backoff_factor=0.3,
+    backoff_jitter=0.3,  # random extra delay so concurrent workers don't retry in lockstep
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=["GET", "PUT"],
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=RETRY))
 
 # Projects from UI showing 0/0 that need updating
 ui_projects_showing_zero = [
@@ -38,19 +57,26 @@ ui_projects_showing_zero = [
     "522996e120d8e49ce4fc4dd35be31a54"   # Campaign 46943732, IT, 21/10/25 18:13
 ]
 
-def check_and_update_project(project_id):
-    """Check project status and update if needed"""
-    print(f"🔍 Checking {project_id[:12]}...", end=" ")
+def check_and_update_project(project_id, label=""):
+    """Check project status and update if needed; the status line is printed in one piece"""
+    parts = [label] if label else []
+    try:
+        return _check_and_update_project(project_id, parts.append)
+    finally:
+        # A single write per line keeps concurrent workers from interleaving output
+        print(" ".join(parts) + "\n", end="")
+
+def _check_and_update_project(project_id, say):
+    say(f"🔍 Checking {project_id[:12]}...")
     
     # First check current status
     url = f"{BASE_URL}/projects/{project_id}"
-    headers = {"Authorization": API_KEY}
     
     try:
         # GET current status
-        response = requests.get(url, headers=headers, timeout=10)
+        response = SESSION.get(url, timeout=10)
         if response.status_code != 200:
-            print(f"❌ GET ERROR: HTTP {response.status_code}")
+            say(f"❌ GET ERROR: HTTP {response.status_code}")
             return False
         
         result = response.json()
@@ -61,33 +87,39 @@ def check_and_update_project(project_id):
             times_per_day = project.get('times_per_day', 0)
             project_name = project.get('name', 'Unknown')
             
-            print(f"Current: ({auto_scan}/{times_per_day})", end=" ")
+            say(f"Current: ({auto_scan}/{times_per_day})")
             
             # Check if update needed
             if auto_scan == 1 and times_per_day == 72:
-                print(f"✅ ALREADY CORRECT")
+                say(f"✅ ALREADY CORRECT")
                 return True
             
             # Update the project
-            print(f"→ UPDATING...", end=" ")
+            say(f"→ UPDATING...")
             update_data = {
                 "auto_scan": 1,
                 "times_per_day": 72
             }
             
-            update_response = requests.put(url, headers=headers, data=update_data, timeout=15)
+            update_response = SESSION.put(url, data=update_data, timeout=15)
             if update_response.status_code != 200:
-                print(f"❌ PUT ERROR: HTTP {update_response.status_code}")
+                say(f"❌ PUT ERROR: HTTP {update_response.status_code}")
                 return False
             
             update_result = update_response.json()
             
             if update_result.get('status', {}).get('code') == 'Success':
+                # Trust the PUT response when it echoes the saved project; no wait or extra GET needed
+                echoed = (update_result.get('response') or {}).get('project') or {}
+                if echoed.get('auto_scan') == 1 and echoed.get('times_per_day') == 72:
+                    say(f"✅ SUCCESS (1/72)")
+                    return True
+                
                 # Verify the update
-                print(f"→ VERIFYING...", end=" ")
+                say(f"→ VERIFYING...")
                 time.sleep(2)  # Wait for update to process
                 
-                verify_response = requests.get(url, headers=headers, timeout=10)
+                verify_response = SESSION.get(url, timeout=10)
                 if verify_response.status_code == 200:
                     verify_result = verify_response.json()
                     if 'response' in verify_result and 'project' in verify_result['response']:
@@ -96,52 +128,58 @@ def check_and_update_project(project_id):
                         new_times_per_day = verify_project.get('times_per_day', 0)
                         
                         if new_auto_scan == 1 and new_times_per_day == 72:
-                            print(f"✅ SUCCESS ({new_auto_scan}/{new_times_per_day})")
+                            say(f"✅ SUCCESS ({new_auto_scan}/{new_times_per_day})")
                             return True
                         else:
-                            print(f"❌ VERIFICATION FAILED ({new_auto_scan}/{new_times_per_day})")
+                            say(f"❌ VERIFICATION FAILED ({new_auto_scan}/{new_times_per_day})")
                             return False
                 
-                print(f"❌ VERIFICATION ERROR")
+                say(f"❌ VERIFICATION ERROR")
                 return False
             else:
-                print(f"❌ UPDATE FAILED: {update_result}")
+                say(f"❌ UPDATE FAILED: {update_result}")
                 return False
         else:
-            print(f"❌ INVALID RESPONSE")
+            say(f"❌ INVALID RESPONSE")
             return False
             
     except Exception as e:
-        print(f"❌ EXCEPTION: {str(e)}")
+        say(f"❌ EXCEPTION: {str(e)}")
         return False
 
 def main():
+    # Ids pasted in from several UI screenshots may repeat; each project only needs one pass
+    pending = list(dict.fromkeys(ui_projects_showing_zero))
+    total = len(pending)
+    
     print("🎯 TARGETED UPDATE FOR UI PROJECTS SHOWING 0/0")
     print("=" * 60)
-    print(f"Updating {len(ui_projects_showing_zero)} projects from UI screenshot")
+    print(f"Updating {total} projects from UI screenshot")
     print("=" * 60)
     
     success_count = 0
     
-    for i, project_id in enumerate(ui_projects_showing_zero, 1):
-        print(f"[{i}/{len(ui_projects_showing_zero)}] ", end="")
-        
-        if check_and_update_project(project_id):
-            success_count += 1
-        
-        time.sleep(1)  # Small delay between updates
+    # Projects are independent, so check/update them concurrently over the shared session
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(check_and_update_project, project_id, f"[{i}/{total}]"): project_id
+            for i, project_id in enumerate(pending, 1)
+        }
+        for future in as_completed(futures):
+            if future.result():
+                success_count += 1
     
     print("\n" + "=" * 60)
     print(f"📊 RESULTS:")
-    print(f"   ✅ Successfully updated: {success_count}/{len(ui_projects_showing_zero)}")
-    print(f"   🎯 Success rate: {(success_count/len(ui_projects_showing_zero)*100):.1f}%")
+    print(f"   ✅ Successfully updated: {success_count}/{total}")
+    print(f"   🎯 Success rate: {(success_count/total*100):.1f}%")
     
-    if success_count == len(ui_projects_showing_zero):
+    if success_count == total:
         print(f"\n🎉 ALL UI PROJECTS SUCCESSFULLY UPDATED!")
         print(f"   Refresh the dashboard to see the changes")
     else:
         print(f"\n⚠️ SOME PROJECTS NEED ATTENTION")
-        print(f"   {len(ui_projects_showing_zero) - success_count} projects failed to update")
+        print(f"   {total - success_count} projects failed to update")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
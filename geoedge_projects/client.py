@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import os
 import time
-import json
+import threading
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 from urllib.parse import urlparse, urljoin
 
@@ -10,6 +10,12 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+# Parse response bodies with orjson when it is installed (faster C codec working on bytes)
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 DEFAULT_TIMEOUT = 30
 
 
@@ -25,6 +31,51 @@ class TimeoutHTTPAdapter(HTTPAdapter):
         return super().send(request, **kwargs)
 
 
+class HeaderRateLimiter:
+    """Paces requests from the API's X-RateLimit-Remaining / X-RateLimit-Reset headers.
+
+    One instance can be shared by every thread using a client. Until a response
+    carries the headers, acquire() never waits.
+    """
+    def __init__(self, safety_floor: int = 2):
+        self.safety_floor = safety_floor
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, headers) -> None:
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining_count = int(remaining)
+            reset_value = float(reset)
+        except ValueError:
+            return
+        # Reset is sent either as an epoch timestamp or as seconds until the window resets
+        reset_at = reset_value if reset_value > 1e9 else time.time() + reset_value
+        with self._lock:
+            self.remaining = remaining_count
+            self.reset_at = reset_at
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self.remaining is None:
+                return
+            window = self.reset_at - time.time()
+            if window <= 0:
+                self.remaining = None
+                return
+            delay = 0.0
+            if self.remaining <= self.safety_floor:
+                # Spread what is left of the budget over the rest of the window
+                delay = window / max(self.remaining, 1)
+            self.remaining -= 1
+        if delay > 0:
+            time.sleep(delay)
+
+
 class GeoEdgeClient:
     def __init__(
         self,
@@ -33,6 +84,8 @@ class GeoEdgeClient:
         timeout: int = DEFAULT_TIMEOUT,
         max_retries: int = 3,
         backoff_factor: float = 0.3,
+        rate_limiter: Optional[HeaderRateLimiter] = None,
+        pool_maxsize: int = 32,
     ):
         self.api_key = api_key or os.getenv("GEOEDGE_API_KEY")
         self.base_url = (base_url or os.getenv("GEOEDGE_API_BASE") or "").rstrip("/")
@@ -41,6 +94,8 @@ class GeoEdgeClient:
         if not self.base_url:
             raise RuntimeError("GEOEDGE_API_BASE is required (set in environment or .env).")
 
+        self.rate_limiter = rate_limiter
+        self.pool_maxsize = pool_maxsize
         self.session = requests.Session()
         self.session.headers.update({"Authorization": self.api_key})
 
@@ -48,10 +103,13 @@ class GeoEdgeClient:
             total=max_retries,
             backoff_factor=backoff_factor,
             status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET", "POST", "PUT", "DELETE"],
+            # POST (create_project) is not idempotent: a retry after a 5xx could create a duplicate project
+            allowed_methods=["GET", "PUT", "DELETE"],
             raise_on_status=False,
         )
-        adapter = TimeoutHTTPAdapter(timeout=timeout, max_retries=retry)
+        # Keep enough pooled keep-alive connections for every fetch_projects_with_locations worker;
+        # urllib3's default of 10 drops (and later reopens) connections beyond that
+        adapter = TimeoutHTTPAdapter(timeout=timeout, max_retries=retry, pool_maxsize=pool_maxsize)
         self.session.mount("https://", adapter)
         self.session.mount("http://", adapter)
 
@@ -63,10 +121,14 @@ class GeoEdgeClient:
         url = path_or_url
         if not path_or_url.lower().startswith(("http://", "https://")):
             url = f"{self.base_url}{path_or_url}"
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
         resp = self.session.request(method, url, params=params, data=data)
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(resp.headers)
         # GeoEdge sometimes returns JSON with HTTP error codes; try to parse either way
         try:
-            payload = resp.json()
+            payload = json_loads(resp.content)
         except ValueError:
             resp.raise_for_status()
             return {}
@@ -88,18 +150,26 @@ class GeoEdgeClient:
         if limit < 1 or limit > 50000:
             raise ValueError("limit must be between 1 and 50000")
 
-        next_path = f"/projects?offset={offset}&limit={limit}"
-        while next_path:
-            data = self._request("GET", next_path)
-            projects = data.get("projects", [])
-            for p in projects:
-                yield p
-            next_page = data.get("next_page")  # absolute URL or None
-            next_path = None
-            if next_page:
-                # Keep using the absolute next_page to avoid reconstructing params
-                parsed = urlparse(next_page)
-                next_path = next_page if parsed.scheme in ("http", "https") else parsed.path
+        # Prefetch one page ahead: the next page downloads while the current one is consumed
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            next_path = f"/projects?offset={offset}&limit={limit}"
+            pending = prefetcher.submit(self._request, "GET", next_path)
+            while pending is not None:
+                data = pending.result()
+                next_path = self._next_page_path(data)
+                pending = prefetcher.submit(self._request, "GET", next_path) if next_path else None
+                for p in data.get("projects", []):
+                    yield p
+
+    @staticmethod
+    def _next_page_path(data: dict) -> Optional[str]:
+        next_page = data.get("next_page")  # absolute URL or None
+        if not next_page:
+            return None
+        # Keep using the absolute next_page to avoid reconstructing params
+        parsed = urlparse(next_page)
+        return next_page if parsed.scheme in ("http", "https") else parsed.path
 
     def get_project(self, project_id: str) -> dict:
         data = self._request("GET", f"/projects/{project_id}")
@@ -137,6 +207,33 @@ class GeoEdgeClient:
         page_limit: int = 500,
         max_pages: Optional[int] = None,
     ) -> Iterable[Dict[str, Any]]:
+        for page in self.iter_alert_pages(
+            project_id=project_id,
+            alert_id=alert_id,
+            trigger_type_id=trigger_type_id,
+            min_datetime=min_datetime,
+            max_datetime=max_datetime,
+            location_id=location_id,
+            full_raw=full_raw,
+            page_limit=page_limit,
+            max_pages=max_pages,
+        ):
+            yield from page
+
+    def iter_alert_pages(
+        self,
+        *,
+        project_id: Optional[str] = None,
+        alert_id: Optional[str] = None,
+        trigger_type_id: Optional[str] = None,
+        min_datetime: Optional[str] = None,
+        max_datetime: Optional[str] = None,
+        location_id: Optional[str] = None,
+        full_raw: Optional[int] = None,
+        page_limit: int = 500,
+        max_pages: Optional[int] = None,
+    ) -> Iterable[List[Dict[str, Any]]]:
+        """Like iter_alerts_history, but yields each page of alerts as one list."""
 
         params: Dict[str, str] = {}
         if project_id:
@@ -174,8 +271,8 @@ class GeoEdgeClient:
                     if response:
                         alerts = response.get("alerts", [])
 
-            for alert in alerts or []:
-                yield alert
+            if alerts:
+                yield alerts
 
             next_page = data.get("next_page") if isinstance(data, dict) else None
             if not next_page:
@@ -235,8 +332,6 @@ class GeoEdgeClient:
                 locations={"Z0": "New York City, NY", "Z2": "Chicago, IL"}
             )
         """
-        import json
-        
         # Prepare form data payload
         payload = {
             "name": name,
@@ -261,15 +356,13 @@ class GeoEdgeClient:
         if ext_lineitem_id:
             payload["ext_lineitem_id"] = ext_lineitem_id
         
-        # Create project using form data (not JSON)
-        import requests
+        # Create project using form data (not JSON), over the client's keep-alive session
         url = f"{self.base_url}/projects"
-        headers = {"Authorization": self.api_key}
         
-        response = requests.post(url, headers=headers, data=payload, timeout=30)
+        response = self.session.post(url, data=payload, timeout=30)
         
         try:
-            result = response.json()
+            result = json_loads(response.content)
         except ValueError:
             response.raise_for_status()
             return {}
@@ -288,19 +381,22 @@ class GeoEdgeClient:
         self,
         *,
         page_limit: int = 1000,
-        max_workers: int = 12,
+        max_workers: Optional[int] = None,
     ) -> List[dict]:
         """Return detailed project dicts (includes locations) by fetching each project."""
-        # 1) Collect minimal list first
-        minimal = list(self.iter_projects_list(limit=page_limit))
-        ids = [p["id"] for p in minimal if "id" in p]
+        # One worker per pooled connection unless told otherwise
+        max_workers = max_workers or self.pool_maxsize
 
-        # 2) Fetch details concurrently
+        # Detail fetches are submitted while the list is still paging, so both stages overlap
         from concurrent.futures import ThreadPoolExecutor, as_completed
         results: List[dict] = []
         errors: List[Tuple[str, Exception]] = []
         with ThreadPoolExecutor(max_workers=max_workers) as ex:
-            fut_to_id = {ex.submit(self.get_project, pid): pid for pid in ids}
+            fut_to_id = {
+                ex.submit(self.get_project, p["id"]): p["id"]
+                for p in self.iter_projects_list(limit=page_limit)
+                if "id" in p
+            }
             for fut in as_completed(fut_to_id):
                 pid = fut_to_id[fut]
                 try:
@@ -322,7 +418,7 @@ class GeoEdgeClient:
         out = []
         for p in projects:
             locs = p.get("locations") or {}
-            loc_keys = {k.upper() for k in locs.keys()} if isinstance(locs, dict) else set()
-            if target & loc_keys:
+            # Short-circuits on the first matching location; no per-project set is built
+            if isinstance(locs, dict) and any(k.upper() in target for k in locs):
                 out.append(p)
         return out
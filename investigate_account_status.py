@@ -12,6 +12,49 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Publisher statuses treated as inactive throughout the investigation
+INACTIVE_STATUSES = ('inactive', 'paused', 'suspended', 'frozen')
+
+# Every per-account figure sections 4-6 need, from one pass over the inactive-account join
+ACCOUNT_STATS_SQL = """
+    SELECT 
+        p.syndicator_id,
+        p.status,
+        COUNT(gep.project_id) as total_projects,
+        MIN(gep.date_created) as first_project,
+        MAX(gep.date_created) as latest_project,
+        DATEDIFF(NOW(), MAX(gep.date_created)) as days_since_last_project,
+        SUM(CASE WHEN gep.date_created >= DATE_SUB(NOW(), INTERVAL 7 DAY) THEN 1 ELSE 0 END) as recent_projects,
+        SUM(CASE WHEN gep.auto_scan = 1 THEN 1 ELSE 0 END) as auto_scan_enabled,
+        SUM(CASE WHEN gep.times_per_day > 0 THEN 1 ELSE 0 END) as has_daily_scans,
+        SUM(CASE WHEN gep.auto_scan = 0 AND gep.times_per_day = 0 THEN 1 ELSE 0 END) as properly_configured,
+        SUM(CASE WHEN gep.auto_scan = 0 AND gep.times_per_day = 0 THEN 0 ELSE 1 END) as needs_reset
+    FROM publishers p
+    JOIN geo_edge_projects gep ON p.syndicator_id = gep.syndicator_id
+    WHERE p.status IN %s
+    GROUP BY p.syndicator_id, p.status
+"""
+
+# Indexes the inactive-account joins below rely on: table -> (suggested name, leading columns)
+RECOMMENDED_INDEXES = {
+    'publishers': ('idx_pub_status', ('status', 'syndicator_id')),
+    'geo_edge_projects': ('idx_synd_date_scan', ('syndicator_id', 'date_created', 'auto_scan', 'times_per_day')),
+}
+
+def check_join_indexes(cursor):
+    """Warn (read-only) when a table has no index led by the columns the joins filter on"""
+    for table, (index_name, wanted) in RECOMMENDED_INDEXES.items():
+        cursor.execute(f"SHOW INDEX FROM {table}")
+        indexes = {}
+        for row in cursor.fetchall():
+            indexes.setdefault(row['Key_name'], []).append((row['Seq_in_index'], row['Column_name']))
+        leading = [tuple(col for _, col in sorted(cols))[:2] for cols in indexes.values()]
+        if wanted[:2] in leading:
+            print(f"   ✅ {table}: index on ({', '.join(wanted[:2])}) present")
+        else:
+            print(f"   ⚠️ {table}: no index led by ({', '.join(wanted[:2])}); joins below will scan the table")
+            print(f"      Suggested (run as DB admin): CREATE INDEX {index_name} ON {table}({', '.join(wanted)})")
+
 def run_investigation_queries():
     """Run comprehensive queries to understand account deactivation patterns"""
     
@@ -59,6 +102,11 @@ def run_investigation_queries():
         if date_columns:
             print(f"\n📅 Date/time columns found: {', '.join(date_columns)}")
         
+        # Preflight: the inactive-account queries below need these indexes to avoid full scans
+        print(f"\n🔎 JOIN INDEX CHECK:")
+        print("-" * 40)
+        check_join_indexes(cursor)
+        
         print(f"\n3️⃣ CURRENT ACCOUNT STATUS DISTRIBUTION:")
         print("-" * 40)
         cursor.execute("""
@@ -74,91 +122,80 @@ def run_investigation_queries():
         for row in status_dist:
             print(f"   {row['status']: <15} {row['count']: >5} accounts")
         
-        print(f"\n4️⃣ INACTIVE ACCOUNTS WITH PROJECT DETAILS:")
-        print("-" * 40)
-        cursor.execute("""
-        SELECT 
-            p.syndicator_id,
-            p.status,
-            COUNT(gep.project_id) as total_projects,
-            MIN(gep.date_created) as first_project,
-            MAX(gep.date_created) as latest_project,
-            DATEDIFF(NOW(), MAX(gep.date_created)) as days_since_last_project
-        FROM publishers p
-        JOIN geo_edge_projects gep ON p.syndicator_id = gep.syndicator_id
-        WHERE p.status IN ('inactive', 'paused', 'suspended', 'frozen')
-        GROUP BY p.syndicator_id, p.status
-        ORDER BY latest_project DESC
-        LIMIT 20
-        """)
-        
-        inactive_details = cursor.fetchall()
-        print("   Account ID    Status       Projects  Last Project    Days Ago")
-        print("   " + "-" * 55)
-        
-        for row in inactive_details:
-            print(f"   {row['syndicator_id']: <12} {row['status']: <12} {row['total_projects']: >8} "
-                  f"{row['latest_project'].strftime('%Y-%m-%d'): <12} {row['days_since_last_project']: >8}")
-        
-        print(f"\n5️⃣ SUSPICIOUS CASES - INACTIVE WITH RECENT PROJECTS:")
-        print("-" * 40)
-        cursor.execute("""
-        SELECT 
-            p.syndicator_id,
-            p.status,
-            COUNT(gep.project_id) as total_projects,
-            MAX(gep.date_created) as latest_project,
-            DATEDIFF(NOW(), MAX(gep.date_created)) as days_since_last_project
-        FROM publishers p
-        JOIN geo_edge_projects gep ON p.syndicator_id = gep.syndicator_id
-        WHERE p.status IN ('inactive', 'paused', 'suspended', 'frozen')
-        AND gep.date_created >= DATE_SUB(NOW(), INTERVAL 7 DAYS)
-        GROUP BY p.syndicator_id, p.status
-        ORDER BY latest_project DESC
-        """)
-        
-        suspicious = cursor.fetchall()
-        if suspicious:
-            print("🚨 ALERT: These accounts became inactive AFTER creating projects:")
-            for row in suspicious:
+        # Sections 4-6 all aggregate the same inactive-account join, so compute every per-account
+        # figure in one pass into a temporary table; each section then orders/filters it in SQL
+        try:
+            cursor.execute("CREATE TEMPORARY TABLE inactive_account_stats AS" + ACCOUNT_STATS_SQL, (INACTIVE_STATUSES,))
+            stats_source, stats_params, temp_table = "inactive_account_stats", None, True
+        except (pymysql.err.OperationalError, pymysql.err.InternalError) as e:
+            # Read-only accounts may lack CREATE TEMPORARY TABLES: aggregate per section instead
+            print(f"   ⚠️ Temporary table unavailable ({e.args[-1]}); each section re-runs the aggregate")
+            stats_source, stats_params, temp_table = f"({ACCOUNT_STATS_SQL}) AS inactive_account_stats", (INACTIVE_STATUSES,), False
+        
+        # Sections 5 and 6 list every matching account: stream those rows instead of buffering them
+        stream = conn.cursor(pymysql.cursors.SSDictCursor)
+        try:
+            print(f"\n4️⃣ INACTIVE ACCOUNTS WITH PROJECT DETAILS:")
+            print("-" * 40)
+            cursor.execute(f"""
+            SELECT * FROM {stats_source}
+            ORDER BY latest_project DESC
+            LIMIT 20
+            """, stats_params)
+            inactive_details = cursor.fetchall()
+            print("   Account ID    Status       Projects  Last Project    Days Ago")
+            print("   " + "-" * 55)
+        
+            for row in inactive_details:
+                print(f"   {row['syndicator_id']: <12} {row['status']: <12} {row['total_projects']: >8} "
+                      f"{row['latest_project'].strftime('%Y-%m-%d'): <12} {row['days_since_last_project']: >8}")
+        
+            print(f"\n5️⃣ SUSPICIOUS CASES - INACTIVE WITH RECENT PROJECTS:")
+            print("-" * 40)
+            stream.execute(f"""
+            SELECT * FROM {stats_source}
+            WHERE recent_projects > 0
+            ORDER BY latest_project DESC
+            """, stats_params)
+            suspicious_count = 0
+            for row in stream:
+                if not suspicious_count:
+                    print("🚨 ALERT: These accounts became inactive AFTER creating projects:")
+                suspicious_count += 1
                 print(f"   🔴 Account {row['syndicator_id']} ({row['status']}): "
-                      f"{row['total_projects']} projects, latest {row['days_since_last_project']} days ago")
-        else:
-            print("✅ No inactive accounts with recent projects (good)")
-        
-        print(f"\n6️⃣ PROJECT CONFIGURATION STATUS FOR INACTIVE ACCOUNTS:")
-        print("-" * 40)
-        cursor.execute("""
-        SELECT 
-            p.syndicator_id,
-            p.status,
-            COUNT(gep.project_id) as total_projects,
-            SUM(CASE WHEN gep.auto_scan = 1 THEN 1 ELSE 0 END) as auto_scan_enabled,
-            SUM(CASE WHEN gep.times_per_day > 0 THEN 1 ELSE 0 END) as has_daily_scans,
-            SUM(CASE WHEN gep.auto_scan = 0 AND gep.times_per_day = 0 THEN 1 ELSE 0 END) as properly_configured
-        FROM publishers p
-        JOIN geo_edge_projects gep ON p.syndicator_id = gep.syndicator_id
-        WHERE p.status IN ('inactive', 'paused', 'suspended', 'frozen')
-        GROUP BY p.syndicator_id, p.status
-        ORDER BY (total_projects - properly_configured) DESC
-        """)
-        
-        config_status = cursor.fetchall()
-        print("   Account ID    Status       Total  AutoScan  DailyScans  Correct  Needs Reset")
-        print("   " + "-" * 70)
-        
-        total_needs_reset = 0
-        for row in config_status:
-            needs_reset = row['total_projects'] - row['properly_configured']
-            total_needs_reset += needs_reset
+                      f"{row['recent_projects']} projects, latest {row['days_since_last_project']} days ago")
+            if not suspicious_count:
+                print("✅ No inactive accounts with recent projects (good)")
+        
+            print(f"\n6️⃣ PROJECT CONFIGURATION STATUS FOR INACTIVE ACCOUNTS:")
+            print("-" * 40)
+            print("   Account ID    Status       Total  AutoScan  DailyScans  Correct  Needs Reset")
+            print("   " + "-" * 70)
+        
+            stream.execute(f"""
+            SELECT * FROM {stats_source}
+            ORDER BY needs_reset DESC
+            """, stats_params)
+            account_count = 0
+            total_needs_reset = 0
+            for row in stream:
+                account_count += 1
+                needs_reset = row['needs_reset']
+                total_needs_reset += needs_reset
             
-            status_icon = "🔴" if needs_reset > 0 else "✅"
-            print(f"   {status_icon} {row['syndicator_id']: <10} {row['status']: <10} "
-                  f"{row['total_projects']: >5} {row['auto_scan_enabled']: >8} "
-                  f"{row['has_daily_scans']: >10} {row['properly_configured']: >7} {needs_reset: >11}")
+                status_icon = "🔴" if needs_reset > 0 else "✅"
+                print(f"   {status_icon} {row['syndicator_id']: <10} {row['status']: <10} "
+                      f"{row['total_projects']: >5} {row['auto_scan_enabled']: >8} "
+                      f"{row['has_daily_scans']: >10} {row['properly_configured']: >7} {needs_reset: >11}")
+        
+        finally:
+            # Closing drains any unread streamed rows, so the DROP can run even after an error
+            stream.close()
+            if temp_table:
+                cursor.execute("DROP TEMPORARY TABLE inactive_account_stats")
         
         print(f"\n📊 SUMMARY:")
-        print(f"   • Total inactive accounts with projects: {len(config_status)}")
+        print(f"   • Total inactive accounts with projects: {account_count}")
         print(f"   • Total projects needing reset: {total_needs_reset}")
         
         if total_needs_reset > 0: